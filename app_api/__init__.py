@@ -0,0 +1 @@
+from .job_api import register_job_api
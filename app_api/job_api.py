@@ -0,0 +1,90 @@
+import json
+import asyncio
+import logging
+from typing import List, Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from nicegui import app
+from core.scheduler import PRIORITIES
+
+logger = logging.getLogger("pdf_purger")
+
+# Seconds between keep-alive comments on idle event streams
+HEARTBEAT_SECONDS = 15
+
+class JobRequest(BaseModel):
+    folders: List[str]
+    thread_count: int = 4
+    auto_threads: bool = False
+    watch: bool = False
+    priority: Optional[str] = None  # urgent, high, normal or low
+
+def _sse(event: dict, name: Optional[str] = None) -> str:
+    prefix = f"event: {name}\n" if name else ""
+    return f"{prefix}data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def register_job_api(app_instance):
+    """Add the JSON job endpoints to the NiceGUI/FastAPI app."""
+
+    def get_job(job_id: str):
+        job = app_instance.process_manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+        return job
+
+    @app.post('/api/jobs', status_code=201)
+    async def submit_job(request: JobRequest):
+        if not request.folders:
+            raise HTTPException(status_code=400, detail="No folders given")
+        if request.priority and request.priority not in PRIORITIES:
+            raise HTTPException(status_code=400, detail=f"Priority must be one of {', '.join(PRIORITIES)}")
+        busy = [folder for folder in request.folders if app_instance.process_manager.is_processing(folder)]
+        if busy:
+            raise HTTPException(status_code=409, detail=f"Already being processed: {', '.join(busy)}")
+        job = app_instance.submit_job(request.folders, {
+            'thread_count': request.thread_count,
+            'auto_threads': request.auto_threads,
+            'watch': request.watch,
+            'priority': request.priority,
+        })
+        return job.to_dict()
+
+    @app.get('/api/jobs')
+    async def list_jobs():
+        return [job.to_dict() for job in app_instance.process_manager.jobs()]
+
+    @app.get('/api/jobs/{job_id}')
+    async def job_status(job_id: str):
+        return get_job(job_id).to_dict()
+
+    @app.post('/api/jobs/{job_id}/cancel')
+    async def cancel_job(job_id: str):
+        job = get_job(job_id)
+        if not app_instance.process_manager.stop_job(job_id):
+            raise HTTPException(status_code=409, detail=f"Job {job_id} is already {job.state}")
+        return job.to_dict()
+
+    @app.get('/api/jobs/{job_id}/events')
+    async def job_events(job_id: str):
+        """Stream the job's progress as server-sent events until it finishes."""
+        job = get_job(job_id)
+
+        async def stream():
+            queue = app_instance.events.subscribe()
+            try:
+                yield _sse(job.to_dict(), "status")
+                while not job.is_finished:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if event.get('job') == job_id:
+                        yield _sse(event, event.get('type'))
+                yield _sse(job.to_dict(), "status")
+            finally:
+                app_instance.events.unsubscribe(queue)
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -6,6 +6,9 @@ class ControlPanel:
     
     def __init__(self, on_start_all, on_stop_all, on_reset):
         self.thread_count = None  # Will be initialized in setup_panel
+        self.auto_threads = None
+        self.watch = None
+        self.priority = None
         self.on_start_all = on_start_all
         self.on_stop_all = on_stop_all
         self.on_reset = on_reset
@@ -32,5 +35,13 @@ class ControlPanel:
 
             # Thread control on the right
             with ui.row().classes('gap-2 items-center'):
+                self.watch = ui.switch('Watch', value=False) \
+                    .tooltip('Keep processing new files as they arrive')
                 ui.label('Threads:')
-                self.thread_count = ui.number(value=4, min=1, max=16).props('size=sm')
+                self.thread_count = ui.number(value=4, min=1, max=16).props('size=sm') \
+                    .tooltip('Upper limit when Auto is enabled')
+                self.auto_threads = ui.switch('Auto', value=False)
+                self.priority = ui.select(
+                    {'': 'Default', 'urgent': 'Urgent', 'high': 'High', 'normal': 'Normal', 'low': 'Low'},
+                    value='', label='Priority'
+                ).props('dense').tooltip('Default uses the priority configured for each folder')
@@ -45,6 +45,8 @@ class FolderManagement:
             on_remove=self.handle_folder_remove
         )
         self.folder_rows.append(row)
+        if folder_path:
+            row.progress_ui.attach(self.app_instance.events, folder_path, self.app_instance.run_state)
         
         # Update storage state if folder_path provided
         if folder_path:
@@ -58,17 +60,16 @@ class FolderManagement:
     async def handle_folder_update(self, folder_row: FolderRow):
         """Handle folder update request."""
         logger.info(f"Handling folder update for {folder_row.folder_path}")
-        if self.app_instance.process_manager.is_processing():
-            ui.notify('Please stop current processing first', 
-                     type='warning')
-            return
-            
         if not folder_row.folder_path:
             ui.notify('Please select a folder first', 
                      type='warning')
             return
         
         folder_path = os.path.abspath(folder_row.folder_path)
+        if self.app_instance.process_manager.is_processing(folder_path):
+            ui.notify('This folder is already being processed', 
+                     type='warning')
+            return
         
         # Update storage state
         paths = list(app.storage.user['folder_paths'])
@@ -86,12 +87,16 @@ class FolderManagement:
 
         # Start processing
         thread_count = self.app_instance.index_page.control_panel.thread_count.value if self.app_instance.index_page.control_panel else 4
-        await self.app_instance.process_folder(folder_path, folder_row.progress_ui, thread_count)
+        auto_threads = self.app_instance.index_page.control_panel.auto_threads.value if self.app_instance.index_page.control_panel else True
+        watch = self.app_instance.index_page.control_panel.watch.value if self.app_instance.index_page.control_panel else False
+        priority = self.app_instance.index_page.control_panel.priority.value or None if self.app_instance.index_page.control_panel else None
+        # Progress reaches this row, and every other open page, through the event bus
+        folder_row.progress_ui.attach(self.app_instance.events, folder_path, self.app_instance.run_state)
+        await self.app_instance.process_folder(folder_path, None, thread_count, auto_threads, watch, priority)
 
     async def handle_folder_remove(self, folder_row: FolderRow):
         """Handle folder removal request."""
-        if self.app_instance.process_manager.is_processing():
-            await self.app_instance.process_manager.stop_processing()
+        if self.app_instance.process_manager.stop_folder(folder_row.folder_path):
             await asyncio.sleep(0.5)
             
         # Update storage state
@@ -116,42 +121,40 @@ class FolderManagement:
             ui.notify('No folders to process', type='warning')
             return
             
-        if self.app_instance.process_manager.is_processing():
-             ui.notify('Processing already in progress', type='warning')
-             return
-
         thread_count = self.app_instance.index_page.control_panel.thread_count.value if self.app_instance.index_page.control_panel else 4
+        auto_threads = self.app_instance.index_page.control_panel.auto_threads.value if self.app_instance.index_page.control_panel else True
+        watch = self.app_instance.index_page.control_panel.watch.value if self.app_instance.index_page.control_panel else False
+        priority = self.app_instance.index_page.control_panel.priority.value or None if self.app_instance.index_page.control_panel else None
         
-        # Create tasks for all folders
-        self.app_instance.current_tasks = [
-            asyncio.create_task(self.app_instance.process_folder(folder_path, FolderRow(folder_path, None, None).progress_ui, thread_count))
-            for folder_path in paths
-        ]
-        self.app_instance.process_manager.start_processing()
-
-        # Wait for all tasks to complete and reset state
-        await asyncio.gather(*self.app_instance.current_tasks, return_exceptions=True)
-        self.app_instance.process_manager.reset()
+        # One job per folder, so each can be followed and stopped on its own
+        started = 0
+        for folder_path in paths:
+            if self.app_instance.process_manager.is_processing(folder_path):
+                continue
+            self.app_instance.submit_job([folder_path], {
+                'thread_count': int(thread_count), 'auto_threads': auto_threads, 'watch': watch,
+                'priority': priority
+            })
+            started += 1
+        if started:
+            ui.notify(f'Started processing {started} folders', type='info')
+        else:
+            ui.notify('All folders are already being processed', type='warning')
 
     async def stop_all_processing(self):
         """Stop all current processing."""
         logger.info("Stop all processing requested")
-        if self.app_instance.process_manager.stop_processing():
-            ui.notify('Processing stopped', type='warning')
-            if self.app_instance.current_tasks:
-                for task in self.app_instance.current_tasks:
-                    if not task.done():
-                        task.cancel()
-                await asyncio.gather(*self.app_instance.current_tasks, return_exceptions=True)
-                self.app_instance.current_tasks = []
+        stopped = self.app_instance.process_manager.stop_all()
+        if stopped:
+            ui.notify(f'Stopping {stopped} jobs', type='warning')
         await asyncio.sleep(0.5)
         ui.navigate.to('/')
 
     async def reset_state(self):
         """Reset application state."""
-        await self.app_instance.process_manager.stop_processing()
+        self.app_instance.process_manager.stop_all()
         app.storage.user['folder_paths'] = []
-        app.storage.user['progress_state'] = {}
+        self.app_instance.run_state.clear()
         self.app_instance._folder_paths = []
         await run.io_bound(save_state, [])
         ui.notify('Application state reset', type='info')
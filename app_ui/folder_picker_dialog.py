@@ -1,14 +1,61 @@
-from nicegui import events, ui
+from nicegui import background_tasks, events, ui, run
 from pathlib import Path
+from collections import OrderedDict
+import os
 import platform
-from typing import Optional, List
+import threading
+import time
+from typing import Optional, List, Tuple
 from nicegui.events import GenericEventArguments
 
+# Rows sent to the grid at a time
+PAGE_SIZE = 500
+# Seconds a directory listing is reused, and how many listings are kept
+LISTING_TTL = 30.0
+LISTING_CACHE_SIZE = 32
+
+_listing_cache: "OrderedDict[Tuple[str, bool, bool], Tuple[float, List[Tuple[str, str, bool]]]]" = OrderedDict()
+_listing_lock = threading.Lock()  # list_directory runs on io_bound threads
+
+def list_directory(path: str, show_files: bool = False, show_hidden: bool = False) -> List[Tuple[str, str, bool]]:
+    """List (name, path, is_dir) entries of a directory, folders first, cached for LISTING_TTL.
+
+    Uses os.scandir, whose entries carry their type, so no extra stat call
+    is made per entry on network shares.
+    """
+    key = (path, show_files, show_hidden)
+    with _listing_lock:
+        cached = _listing_cache.get(key)
+        if cached and time.monotonic() - cached[0] < LISTING_TTL:
+            _listing_cache.move_to_end(key)
+            return cached[1]
+
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if not show_hidden and entry.name.startswith('.'):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir or show_files:
+                entries.append((entry.name, entry.path, is_dir))
+    entries.sort(key=lambda e: (not e[2], e[0].lower()))
+
+    with _listing_lock:
+        _listing_cache[key] = (time.monotonic(), entries)
+        _listing_cache.move_to_end(key)
+        while len(_listing_cache) > LISTING_CACHE_SIZE:
+            _listing_cache.popitem(last=False)
+    return entries
+
 class FolderPickerDialog(ui.dialog):
     """Local Folder Picker"""
 
     def __init__(self, directory: str, *,
-                 upper_limit: Optional[str] = ..., multiple: bool = False, show_hidden_files: bool = False) -> None:
+                 upper_limit: Optional[str] = ..., multiple: bool = False, show_hidden_files: bool = False,
+                 show_files: bool = False) -> None:
         """Local Folder Picker
 
         This is a simple folder picker that allows you to select a folder from the local filesystem where NiceGUI is running.
@@ -17,6 +64,7 @@ class FolderPickerDialog(ui.dialog):
         :param upper_limit: The directory to stop at (None: no limit, default: same as the starting directory).
         :param multiple: Whether to allow multiple folders to be selected.
         :param show_hidden_files: Whether to show hidden files.
+        :param show_files: Whether to list files as well as folders.
         """
         super().__init__()
 
@@ -26,7 +74,10 @@ class FolderPickerDialog(ui.dialog):
         else:
             self.upper_limit = Path(directory if upper_limit == ... else upper_limit).expanduser()
         self.show_hidden_files = show_hidden_files
+        self.show_files = show_files
         self.multiple = multiple
+        self.entries: List[Tuple[str, str, bool]] = []
+        self.shown = 0
 
         with self, ui.card():
             self.add_drives_toggle()
@@ -34,10 +85,13 @@ class FolderPickerDialog(ui.dialog):
                 'columnDefs': [{'field': 'name', 'headerName': 'Folder'}],
                 'rowSelection': 'multiple' if multiple else 'single',
             }, html_columns=[0]).classes('w-96').on('cellDoubleClicked', self.handle_double_click)
+            with ui.row().classes('w-full items-center justify-between'):
+                self.count_label = ui.label().classes('text-sm text-gray-600')
+                self.more_button = ui.button('Show more', on_click=self.show_more).props('flat dense')
             with ui.row().classes('w-full justify-end'):
                 ui.button('Cancel', on_click=self.close).props('outline')
                 ui.button('Ok', on_click=self._handle_ok)
-        self.update_grid()
+        background_tasks.create(self.update_grid(), name='folder picker listing')
 
     def add_drives_toggle(self):
         if platform.system() == 'Windows':
@@ -45,41 +99,54 @@ class FolderPickerDialog(ui.dialog):
             drives = win32api.GetLogicalDriveStrings().split('\000')[:-1]
             self.drives_toggle = ui.toggle(drives, value=drives[0], on_change=self.update_drive)
 
-    def update_drive(self):
+    async def update_drive(self):
         self.path = Path(self.drives_toggle.value).expanduser()
-        self.update_grid()
+        await self.update_grid()
 
-    def update_grid(self) -> None:
-        """Update the grid with the current directory contents."""
-        paths = list(self.path.glob('*'))
-        if not self.show_hidden_files:
-            paths = [p for p in paths if not p.name.startswith('.')]
-        paths.sort(key=lambda p: p.name.lower())
-        paths.sort(key=lambda p: not p.is_dir())
+    async def update_grid(self) -> None:
+        """Show the first page of the current directory's contents."""
+        try:
+            self.entries = await run.io_bound(list_directory, str(self.path), self.show_files, self.show_hidden_files)
+        except OSError as e:
+            with self:  # Also called from a background task, outside any slot
+                ui.notify(f'Cannot open {self.path}: {e.strerror or e}', type='warning')
+            self.entries = []
 
-        self.grid.options['rowData'] = [
-            {
-                'name': f'📁 <strong>{p.name}</strong>' if p.is_dir() else p.name,
-                'path': str(p),
-            }
-            for p in paths
-        ]
+        self.grid.options['rowData'] = []
         if (self.upper_limit is None and self.path != self.path.parent) or \
                 (self.upper_limit is not None and self.path != self.upper_limit):
-            self.grid.options['rowData'].insert(0, {
+            self.grid.options['rowData'].append({
                 'name': '📁 <strong>..</strong>',
                 'path': str(self.path.parent),
+                'is_dir': True,
             })
+        self.shown = 0
+        self.show_more()
+
+    def show_more(self) -> None:
+        """Add the next page of entries to the grid."""
+        page = self.entries[self.shown:self.shown + PAGE_SIZE]
+        self.grid.options['rowData'].extend(
+            {
+                'name': f'📁 <strong>{name}</strong>' if is_dir else name,
+                'path': path,
+                'is_dir': is_dir,
+            }
+            for name, path, is_dir in page
+        )
+        self.shown += len(page)
+        self.count_label.text = f'{self.shown} of {len(self.entries)}' if self.entries else 'Empty'
+        self.more_button.visible = self.shown < len(self.entries)
         self.grid.update()
 
-    def handle_double_click(self, e: events.GenericEventArguments) -> None:
+    async def handle_double_click(self, e: events.GenericEventArguments) -> None:
         """Handle double click on a cell."""
-        self.path = Path(e.args['data']['path'])
-        if self.path.is_dir():
-            self.update_grid()
+        if e.args['data'].get('is_dir'):
+            self.path = Path(e.args['data']['path'])
+            await self.update_grid()
 
     async def _handle_ok(self):
         """Handle the OK button click."""
         rows = await self.grid.get_selected_rows()
-        selected_folders = [r['path'] for r in rows if Path(r['path']).is_dir()]
+        selected_folders = [r['path'] for r in rows if r.get('is_dir')]
         self.submit(selected_folders)
@@ -23,19 +23,8 @@ class IndexPage:
         async def index_page():
             """Main application page."""
             # Initialize storage when page loads
-            if 'processing' not in app.storage.user:
-                app.storage.user['processing'] = False
-            if 'stop_requested' not in app.storage.user:
-                app.storage.user['stop_requested'] = False
-            if 'active_folders' not in app.storage.user:
-                app.storage.user['active_folders'] = []
             if 'folder_paths' not in app.storage.user:
                 app.storage.user['folder_paths'] = self._folder_paths.copy()
-            if 'progress_state' not in app.storage.user:
-                app.storage.user['progress_state'] = {}
-            
-            # Sync process manager with storage
-            self.app_instance.process_manager.sync_with_storage()
             
             await self.initialize_page()
 
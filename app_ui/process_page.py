@@ -21,12 +21,13 @@ class ProcessPage:
                 ui.button(icon='arrow_back', on_click=lambda: self.show_main_page()).classes('back-button')
                 ui.label(f'Processing: {Path(folder_path).name}').classes('text-xl font-bold ml-4')
             
-            # Progress components
+            # Progress components, following any job that processes this folder
             progress_ui = ProgressUI()
+            progress_ui.attach(self.app_instance.events, folder_path, self.app_instance.run_state)
             
             # Control buttons
             with ui.row().classes('w-full justify-end gap-2 mb-4'):
-                ui.button('Stop', on_click=self.app_instance.process_manager.stop_processing).classes('bg-red-500')
+                ui.button('Stop', on_click=lambda: self.stop_processing(folder_path)).classes('bg-red-500')
                 ui.button('Start Processing', on_click=lambda: self.start_processing(folder_path, progress_ui)).classes('bg-green-500')
 
     async def start_processing(self, folder_path: str, progress_ui: ProgressUI):
@@ -34,12 +35,17 @@ class ProcessPage:
         # Add a small delay to ensure WebSocket connection is established
         await asyncio.sleep(0.1)
         try:
-            # Use default thread count of 4 since we don't have access to control panel on this page
-            await self.app_instance.process_folder(folder_path, progress_ui, 4)
+            # No control panel on this page, so let the auto controller pick the worker count
+            await self.app_instance.process_folder(folder_path, None, 16, auto_threads=True)
         except Exception as e:
             logger.error(f"Error in process page: {e}")
             ui.notify(f'Error: {str(e)}', type='negative')
 
+    def stop_processing(self, folder_path: str):
+        """Stop the job processing this folder."""
+        if self.app_instance.process_manager.stop_folder(folder_path):
+            ui.notify("Processing will stop", color="warning", position="top")
+
     def show_main_page(self):
         """Show the main folder management UI."""
         self.app_instance.index_page.current_folder_path = None
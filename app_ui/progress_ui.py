@@ -1,6 +1,7 @@
-from nicegui import ui, app
+from nicegui import ui
 from typing import Dict
 import asyncio
+import os
 
 class ProgressUI:
     """Manage progress display components."""
@@ -10,8 +11,9 @@ class ProgressUI:
         self.status_label = None
         self.messages_log = None
         self.progress_data = {} # Store the latest progress data here
+        self.folder_path = None
+        self._subscription = None
         self.setup_components()
-        self.sync_from_storage()
 
     def setup_components(self):
         """Setup progress UI components."""
@@ -44,37 +46,44 @@ class ProgressUI:
             
             if message_type != 'progress':
                 self.status_label.text = message
-        
-        # Sync to storage
-        asyncio.create_task(self._sync_to_storage())
+
+    def attach(self, events, folder_path: str, run_state=None):
+        """Show progress events for folder_path from any job, until the page is closed.
+
+        With a run state store, the folder's latest state is shown first.
+        """
+        self.folder_path = os.path.abspath(folder_path)
+        if run_state is not None:
+            self.restore(run_state.get(self.folder_path))
+        if self._subscription is not None:
+            return  # Already listening; only the folder changed
+        self._subscription = events.subscribe()
+
+        async def forward():
+            while True:
+                event = await self._subscription.get()
+                if event.get('folder') == self.folder_path and event.get('type') != 'job':
+                    self.update(event)
+
+        task = asyncio.create_task(forward())
+
+        def detach():
+            task.cancel()
+            events.unsubscribe(self._subscription)
+
+        ui.context.client.on_disconnect(detach)
 
     def clear(self):
         """Clear progress display."""
         self.progress_bar.value = 0
         self.status_label.text = ""
         self.messages_log.clear()
-        asyncio.create_task(self._sync_to_storage())
 
-    def sync_from_storage(self):
-        """Sync progress state from storage on reconnection."""
-        try:
-            state = app.storage.user.get('progress_state', {})
-            if state:
-                self.progress_bar.value = state.get('progress', 0.0)
-                self.status_label.text = state.get('text', '')
-                self.messages_log.clear()
-                for message in state.get('messages', []):
-                    self.messages_log.push(message)
-        except RuntimeError:
-            pass  # Not in page context
-            
-    async def _sync_to_storage(self):
-        """Sync progress state to storage."""
-        try:
-            app.storage.user['progress_state'] = {
-                'progress': self.progress_bar.value,
-                'text': self.status_label.text,
-                'messages': []  # Messages are not stored in storage as they are ephemeral
-            }
-        except RuntimeError:
-            pass  # Not in page context
+    def restore(self, state: Dict):
+        """Show a folder's state from the run state store, e.g. after reconnecting."""
+        self.clear()
+        if state:
+            self.progress_bar.value = state.get('progress', 0.0)
+            self.status_label.text = state.get('text', '')
+            for message in state.get('messages', []):
+                self.messages_log.push(message)
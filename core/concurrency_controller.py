@@ -0,0 +1,167 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger("pdf_purger")
+
+try:
+    import psutil
+except ImportError:  # Optional dependency, fall back to /proc/stat
+    psutil = None
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter whose limit can be changed while tasks hold slots."""
+    def __init__(self, limit: int):
+        self._limit = max(1, int(limit))
+        self._active = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def set_limit(self, limit: int):
+        """Change the limit; running tasks keep their slots when lowering."""
+        async with self._condition:
+            self._limit = max(1, int(limit))
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+
+class NestedLimiter:
+    """Hold a slot in a run's own limiter and in the worker budget shared by all runs."""
+    def __init__(self, local, shared):
+        self.local = local
+        self.shared = shared
+
+    async def __aenter__(self):
+        await self.local.__aenter__()
+        try:
+            await self.shared.__aenter__()
+        except BaseException:
+            await self.local.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self.shared.__aexit__(exc_type, exc, tb)
+        finally:
+            await self.local.__aexit__(exc_type, exc, tb)
+
+
+def _read_cpu_times() -> Optional[Tuple[float, float, float]]:
+    """Return cumulative (busy, iowait, total) CPU times, or None if unavailable."""
+    if psutil is not None:
+        times = psutil.cpu_times()
+        iowait = getattr(times, 'iowait', 0.0)
+        idle = times.idle + iowait
+        total = sum(times)
+        return total - idle, iowait, total
+    try:
+        with open('/proc/stat', 'r') as f:
+            fields = [float(v) for v in f.readline().split()[1:]]
+        idle, iowait = fields[3], fields[4]
+        total = sum(fields[:8])  # guest time is already counted in user time
+        return total - idle - iowait, iowait, total
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class ConcurrencyController:
+    """Adjust an AdaptiveLimiter from observed throughput, CPU use and I/O wait."""
+    def __init__(self, limiter: AdaptiveLimiter, min_workers: int = 1,
+                 max_workers: int = 16, interval: float = 10.0, name: str = ""):
+        self.limiter = limiter
+        self.min_workers = max(1, int(min_workers))
+        self.max_workers = max(self.min_workers, int(max_workers))
+        self.interval = interval
+        self.name = name
+        self._completed = 0
+        self._last_throughput = None
+        self._last_direction = 0
+
+    def record_completion(self):
+        """Count a finished file towards the throughput sample."""
+        self._completed += 1
+
+    async def run(self):
+        """Sample and adjust until cancelled."""
+        last_cpu = _read_cpu_times()
+        last_time = time.monotonic()
+        last_completed = self._completed
+
+        while True:
+            await asyncio.sleep(self.interval)
+
+            now = time.monotonic()
+            cpu = _read_cpu_times()
+            throughput = (self._completed - last_completed) / max(now - last_time, 1e-6)
+            cpu_busy = io_wait = None
+            if cpu and last_cpu and cpu[2] > last_cpu[2]:
+                total = cpu[2] - last_cpu[2]
+                cpu_busy = (cpu[0] - last_cpu[0]) / total
+                io_wait = (cpu[1] - last_cpu[1]) / total
+
+            last_cpu, last_time, last_completed = cpu, now, self._completed
+            await self._adjust(throughput, cpu_busy, io_wait)
+
+    async def _adjust(self, throughput: float, cpu_busy: Optional[float], io_wait: Optional[float]):
+        """Hill-climb the worker count, reverting changes that cost throughput."""
+        current = self.limiter.limit
+        previous = self._last_throughput
+        target, reason = current, "holding"
+
+        if throughput <= 0:
+            reason = "no files completed in sample window"
+        elif previous and self._last_direction > 0 and throughput < previous * 0.9:
+            target, reason = current - 1, "throughput dropped after last increase"
+        elif cpu_busy is not None and cpu_busy > 0.9:
+            if previous and throughput <= previous:
+                target, reason = current - 1, "CPU saturated without throughput gain"
+            else:
+                reason = "CPU saturated"
+        elif io_wait is not None and io_wait > 0.25:
+            if not previous or throughput >= previous * 0.95:
+                target, reason = current + 1, "high I/O wait, overlapping more reads"
+            else:
+                reason = "high I/O wait, storage saturated"
+        elif cpu_busy is None or cpu_busy < 0.75:
+            target, reason = current + 1, "spare capacity"
+
+        target = min(max(target, self.min_workers), self.max_workers)
+        self._last_direction = (target > current) - (target < current)
+        if throughput > 0:
+            self._last_throughput = throughput
+
+        cpu_text = f"{cpu_busy:.0%}" if cpu_busy is not None else "n/a"
+        io_text = f"{io_wait:.0%}" if io_wait is not None else "n/a"
+        if target != current:
+            await self.limiter.set_limit(target)
+            logger.info(f"Auto concurrency {self.name}: {current} -> {target} workers ({reason}; "
+                        f"throughput={throughput:.2f} files/s, cpu={cpu_text}, iowait={io_text})")
+        else:
+            logger.debug(f"Auto concurrency {self.name}: keeping {current} workers ({reason}; "
+                         f"throughput={throughput:.2f} files/s, cpu={cpu_text}, iowait={io_text})")
+
+
+def default_worker_count(max_workers: int) -> int:
+    """Initial worker count for auto mode."""
+    return max(1, min(os.cpu_count() or 1, int(max_workers)))
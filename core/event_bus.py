@@ -0,0 +1,51 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger("pdf_purger")
+
+class EventBus:
+    """Fan out progress events to any number of async subscribers.
+
+    Each subscriber gets its own bounded queue; a subscriber that falls
+    behind loses its oldest events rather than slowing the run down.
+    """
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def publish(self, event: Dict):
+        event.setdefault('time', time.time())
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # Drop the oldest event for slow readers
+            queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+class ProgressPublisher:
+    """Progress target that publishes every update on the bus and forwards it to a UI.
+
+    Used in place of the page's ProgressUI, so browser pages and API
+    clients see the same events.
+    """
+    def __init__(self, bus: EventBus, folder_path: str, target=None, job_id: Optional[str] = None):
+        self.bus = bus
+        self.folder_path = folder_path
+        self.target = target
+        self.job_id = job_id
+
+    def update(self, progress_data: Dict):
+        self.bus.publish(dict(progress_data, folder=self.folder_path, job=self.job_id))
+        if self.target is not None:
+            try:
+                self.target.update(progress_data)
+            except Exception as e:
+                logger.debug(f"Progress display update failed: {e}")
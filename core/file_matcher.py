@@ -0,0 +1,106 @@
+import os
+import re
+import fnmatch
+from typing import Dict, Iterable, Iterator, Optional
+from pdf_processor.archives import PURGED_ARCHIVE_SUFFIX
+
+# Subfolders the purger creates inside each processed folder
+WORK_DIRS = ("to_delete", "logs")
+
+DEFAULT_INCLUDE = ("bilag_*.pdf",)
+
+
+def _compile(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """Compile glob patterns into one case-insensitive regex, None if empty."""
+    patterns = [p.strip().replace('\\', '/').strip('/') for p in patterns if p and p.strip()]
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns), re.IGNORECASE)
+
+
+class FileMatcher:
+    """Include/exclude glob patterns for files and directories.
+
+    Patterns without a slash match names at any depth; patterns with a
+    slash match the path relative to the folder root. Excluded directories
+    are pruned during the walk, and the purger's own work subfolders are
+    always skipped. Files matching the archive patterns are treated as
+    virtual directories whose members are matched by name.
+    """
+    def __init__(self, include: Iterable[str] = DEFAULT_INCLUDE, exclude: Iterable[str] = (),
+                 exclude_dirs: Iterable[str] = (), archives: Iterable[str] = ()):
+        self._include = _compile(include)
+        self._exclude = _compile(exclude)
+        self._exclude_dirs = _compile(exclude_dirs)
+        self._archives = _compile(archives)
+
+    @classmethod
+    def from_settings(cls, settings: Dict) -> "FileMatcher":
+        return cls(
+            include=settings.get('include_patterns') or DEFAULT_INCLUDE,
+            exclude=settings.get('exclude_patterns') or (),
+            exclude_dirs=settings.get('exclude_dirs') or (),
+            archives=settings.get('archive_patterns') or ()
+        )
+
+    @staticmethod
+    def _matches(pattern: Optional[re.Pattern], name: str, relative: str) -> bool:
+        return pattern is not None and (pattern.match(name) is not None or pattern.match(relative) is not None)
+
+    def matches_file(self, name: str, relative: str = "") -> bool:
+        """Check a file name (and its root-relative path) against the patterns."""
+        relative = relative or name
+        return (self._include is not None and self._matches(self._include, name, relative)
+                and not self._matches(self._exclude, name, relative))
+
+    def matches_archive(self, name: str, relative: str = "") -> bool:
+        """Check whether a file is an archive to look inside."""
+        if name.lower().endswith(PURGED_ARCHIVE_SUFFIX):
+            return False  # Our own output
+        relative = relative or name
+        return self._matches(self._archives, name, relative) and not self._matches(self._exclude, name, relative)
+
+    def matches_member(self, member_name: str) -> bool:
+        """Check an archive member path against the file patterns."""
+        return self.matches_file(member_name.rsplit('/', 1)[-1], member_name)
+
+    def prunes_dir(self, name: str, relative: str) -> bool:
+        """Check whether a directory should not be descended into."""
+        if relative in WORK_DIRS:
+            return True
+        return self._matches(self._exclude_dirs, name, relative)
+
+    def matches_path(self, folder_path: str, file_path: str) -> bool:
+        """Check an absolute path below folder_path, including its directories."""
+        relative = os.path.relpath(file_path, folder_path).replace(os.sep, '/')
+        parts = relative.split('/')
+        if parts[0] == '..':
+            return False
+        for depth in range(1, len(parts)):
+            if self.prunes_dir(parts[depth - 1], '/'.join(parts[:depth])):
+                return False
+        return self.matches_file(parts[-1], relative) or self.matches_archive(parts[-1], relative)
+
+    def walk(self, folder_path: str) -> Iterator[str]:
+        """Yield matching files and archives below folder_path, pruning excluded subtrees."""
+        stack = [(folder_path, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    subdirs = []
+                    for entry in entries:
+                        relative = prefix + entry.name
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if not self.prunes_dir(entry.name, relative):
+                                subdirs.append((entry.path, relative + '/'))
+                        elif self.matches_file(entry.name, relative) or \
+                                self.matches_archive(entry.name, relative):
+                            yield entry.path
+            except OSError:
+                continue  # Unreadable directory, same as os.walk
+            stack.extend(reversed(subdirs))
@@ -1,7 +1,9 @@
 import os
 from pathlib import Path
-from typing import List, Tuple
+import shutil
+from typing import List, Optional, Tuple
 from core.file_tracker import FileTracker
+from core.file_matcher import FileMatcher, WORK_DIRS
 import logging
 import asyncio
 from nicegui import run
@@ -12,8 +14,10 @@ class FileScanner:
     """Handle file scanning and validation."""
     
     @staticmethod
-    async def scan_pdfs(folder_path: str, file_tracker: FileTracker) -> Tuple[List[str], List[str]]:
+    async def scan_pdfs(folder_path: str, file_tracker: FileTracker,
+                        matcher: Optional[FileMatcher] = None) -> Tuple[List[str], List[str]]:
         """Scan folder and all subfolders for PDFs to process."""
+        matcher = matcher or FileMatcher()
         file_list = []
         messages = []
         loop = asyncio.get_running_loop()
@@ -21,14 +25,8 @@ class FileScanner:
         try:
             # Run the file scanning in a thread pool
             def scan_directory():
-                files = []
-                for root, _, files_in_dir in os.walk(folder_path):
-                    for file in files_in_dir:
-                        if file.lower().startswith("bilag_") and file.lower().endswith(".pdf"):
-                            file_path = os.path.join(root, file)
-                            if not file_tracker.is_processed(file_path):
-                                files.append(file_path)
-                return files
+                return [file_path for file_path in matcher.walk(folder_path)
+                        if not file_tracker.is_processed(file_path)]
 
             # Execute the scan in a thread pool
             file_list = await run.io_bound(scan_directory)
@@ -36,7 +34,8 @@ class FileScanner:
             messages.extend([
                 f"Found {len(file_list)} new PDF files to process",
                 f"({len(file_tracker.purged_files)} previously processed, "
-                f"{len(file_tracker.skipped_files)} skipped)"
+                f"{len(file_tracker.skipped_files)} skipped, "
+                f"{len(file_tracker.failed_files)} failed)"
             ])
 
         except Exception as e:
@@ -60,11 +59,11 @@ class FileScanner:
                 folder.mkdir(parents=True, exist_ok=True)
                 
                 # Create required subfolders
-                (folder / "to_delete").mkdir(exist_ok=True)
-                (folder / "logs").mkdir(exist_ok=True)
+                for work_dir in WORK_DIRS:
+                    (folder / work_dir).mkdir(exist_ok=True)
                 
                 # Initialize tracking files if they don't exist
-                for track_file in ["purged_files.txt", "skipped_files.txt"]:
+                for track_file in ["purged_files.txt", "skipped_files.txt", "failed_files.txt"]:
                     track_path = folder / track_file
                     if not track_path.exists():
                         track_path.touch()
@@ -99,6 +98,25 @@ class FileScanner:
         except Exception as e:
             logger.error(f"Error during temp file cleanup: {e}")
 
+    @staticmethod
+    async def quarantine_file(folder_path: str, file_path: str) -> Optional[str]:
+        """Move a file that cannot be processed into the folder's to_delete subfolder."""
+        try:
+            def move():
+                relative = os.path.relpath(file_path, folder_path)
+                if relative.startswith(os.pardir):
+                    relative = os.path.basename(file_path)
+                target = os.path.join(folder_path, "to_delete", relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(file_path, target)
+                return target
+
+            return await run.io_bound(move)
+
+        except Exception as e:
+            logger.error(f"Could not quarantine {file_path}: {e}")
+            return None
+
     @staticmethod
     async def validate_folder(folder_path: str) -> Tuple[bool, str]:
         """Validate folder path and accessibility."""
@@ -127,8 +145,10 @@ class FileScanner:
             return False, f"Error validating folder: {str(e)}"
 
     @staticmethod
-    async def get_folder_stats(folder_path: str, file_tracker: FileTracker) -> dict[str, int]:
+    async def get_folder_stats(folder_path: str, file_tracker: FileTracker,
+                               matcher: Optional[FileMatcher] = None) -> dict[str, int]:
         """Get folder statistics."""
+        matcher = matcher or FileMatcher()
         loop = asyncio.get_running_loop()
         
         try:
@@ -140,10 +160,8 @@ class FileScanner:
                     'pending_files': 0
                 }
                 
-                for root, _, files in os.walk(folder_path):
-                    for file in files:
-                        if file.lower().startswith("bilag_") and file.lower().endswith(".pdf"):
-                            stats['total_files'] += 1
+                for _ in matcher.walk(folder_path):
+                    stats['total_files'] += 1
                                 
                 stats['pending_files'] = (
                     stats['total_files'] 
@@ -1,40 +1,85 @@
-from typing import Set
+import threading
+from typing import Dict, Optional
 from pathlib import Path
 from nicegui import run
+from core.path_index import PathIndex
 
 class FileTracker:
-    """Track processed and skipped files."""
+    """Track processed, skipped and permanently failed files.
+
+    Purged and skipped files are held in PathIndex objects, which keep
+    8 bytes per file instead of a full path string, so folders with
+    millions of processed files load in constant time and memory. The
+    text files stay the record of truth; the .idx files next to them
+    are rebuilt from them whenever missing or out of date. Construct
+    the tracker off the event loop, since a rebuild reads the text files.
+    """
     def __init__(self, folder_path: str):
         self.folder_path = Path(folder_path)
-        self.purged_files = self._load_file_set("purged_files.txt")
-        self.skipped_files = self._load_file_set("skipped_files.txt")
-        
-    def _load_file_set(self, filename: str) -> Set[str]:
-        """Load a set of files from tracking file."""
+        self._write_lock = threading.Lock()
+        self.purged_files = PathIndex(folder_path, str(self.folder_path / "purged_files.txt"))
+        self.skipped_files = PathIndex(folder_path, str(self.folder_path / "skipped_files.txt"))
+        self.failed_files = self._load_failures("failed_files.txt")
+
+    def _load_failures(self, filename: str) -> Dict[str, str]:
+        """Load failed files and their reasons from a tab-separated tracking file."""
+        failures = {}
         file_path = self.folder_path / filename
         if file_path.exists():
-            with open(file_path, 'r') as f:
-                return {line.strip() for line in f if line.strip()}
-        return set()
-        
-    def _save_to_file(self, filename: str, file_path: str):
-        """Save a file path to tracking file."""
-        with open(self.folder_path / filename, 'a') as f:
-            f.write(f"{file_path}\n")
-            
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    path, _, reason = line.rstrip('\n').partition('\t')
+                    if path.strip():
+                        failures[path.strip()] = reason
+        return failures
+
+    def _save_to_file(self, filename: str, file_path: str, index: Optional[PathIndex] = None):
+        """Append a file path to a tracking file, keeping its index current."""
+        target = self.folder_path / filename
+        line = f"{file_path}\n".encode('utf-8', 'surrogateescape')
+        with self._write_lock:
+            size_before = target.stat().st_size if target.exists() else 0
+            with open(target, 'ab') as f:
+                f.write(line)
+            # Lines appended by another node in between are picked up on the next load
+            if index is not None and size_before == index.covered:
+                index.record_appended(len(line))
+
     def is_processed(self, file_path: str) -> bool:
-        """Check if file has been processed or skipped."""
-        return (file_path in self.purged_files or 
-                file_path in self.skipped_files)
-            
-    def mark_purged(self, file_path: str):
+        """Check if file has been processed, skipped or failed permanently."""
+        return (file_path in self.purged_files or
+                file_path in self.skipped_files or
+                file_path in self.failed_files)
+
+    def status(self, file_path: str) -> Optional[str]:
+        """Final status recorded for a file: purged, skipped, failed or None."""
+        if file_path in self.purged_files:
+            return "purged"
+        if file_path in self.failed_files:
+            return "failed"
+        if file_path in self.skipped_files:
+            return "skipped"
+        return None
+
+    async def mark_purged(self, file_path: str):
         """Mark file as successfully purged."""
-        if file_path not in self.purged_files:
-            self.purged_files.add(file_path)
-            run.io_bound(self._save_to_file, "purged_files.txt", file_path)
-            
-    def mark_skipped(self, file_path: str):
+        if self.purged_files.add(file_path):
+            await run.io_bound(self._save_to_file, "purged_files.txt", file_path, self.purged_files)
+
+    async def mark_skipped(self, file_path: str):
         """Mark file as skipped."""
-        if file_path not in self.skipped_files:
-            self.skipped_files.add(file_path)
-            run.io_bound(self._save_to_file, "skipped_files.txt", file_path)
+        if self.skipped_files.add(file_path):
+            await run.io_bound(self._save_to_file, "skipped_files.txt", file_path, self.skipped_files)
+
+    async def mark_failed(self, file_path: str, reason: str):
+        """Mark file as permanently failed, keeping the reason."""
+        if file_path not in self.failed_files:
+            reason = " ".join(reason.split())  # Keep one record per line
+            self.failed_files[file_path] = reason
+            await run.io_bound(self._save_to_file, "failed_files.txt", f"{file_path}\t{reason}")
+
+    def close(self):
+        """Write the indexes of files marked during this run."""
+        with self._write_lock:
+            self.purged_files.close()
+            self.skipped_files.close()
@@ -0,0 +1,139 @@
+import os
+import time
+import asyncio
+import logging
+import platform
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from nicegui import run
+from core.file_matcher import FileMatcher
+
+logger = logging.getLogger("pdf_purger")
+
+try:
+    from watchfiles import awatch, Change
+except ImportError:  # Optional dependency, fall back to stat polling
+    awatch = None
+
+NETWORK_FILESYSTEMS = {'cifs', 'smb3', 'smbfs', 'nfs', 'nfs4', 'afs', 'fuse.sshfs', '9p'}
+
+
+def is_network_mount(path: str) -> bool:
+    """Guess whether path lives on a network filesystem where inotify sees no remote changes."""
+    path = os.path.abspath(path)
+    if platform.system() == 'Windows':
+        return path.startswith('\\\\')
+    try:
+        best, fs_type = "", ""
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) \
+                        and len(mount_point) > len(best):
+                    best, fs_type = mount_point, fields[2]
+        return fs_type in NETWORK_FILESYSTEMS
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    """Report new target files in a folder once they have stopped changing.
+
+    Uses filesystem events through watchfiles, polling on network mounts
+    (or when watchfiles is unavailable). A file is handed to on_file after
+    its size and mtime have been stable for settle_seconds.
+    """
+    def __init__(self, folder_path: str, on_file: Callable[[str], Awaitable[None]],
+                 matcher: FileMatcher, settle_seconds: float = 2.0,
+                 poll_interval: float = 5.0, force_polling: Optional[bool] = None):
+        self.folder_path = folder_path
+        self.on_file = on_file
+        self.matcher = matcher
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.force_polling = is_network_mount(folder_path) if force_polling is None else force_polling
+        # path -> (signature, time the signature was first seen), None until first stat
+        self._candidates: Dict[str, Optional[Tuple[Tuple[int, int], float]]] = {}
+
+    async def run(self):
+        """Watch until cancelled."""
+        mode = "polling" if self.force_polling or awatch is None else "events"
+        logger.info(f"Watching {self.folder_path} for new files ({mode})")
+        settle_task = asyncio.create_task(self._settle_loop())
+        try:
+            if awatch is not None:
+                await self._watch_events()
+            else:
+                await self._poll()
+        finally:
+            settle_task.cancel()
+            logger.info(f"Stopped watching {self.folder_path}")
+
+    def _filter(self, change, path: str) -> bool:
+        return change != Change.deleted and self.matcher.matches_path(self.folder_path, path)
+
+    async def _watch_events(self):
+        async for changes in awatch(self.folder_path, watch_filter=self._filter,
+                                    force_polling=self.force_polling,
+                                    poll_delay_ms=int(self.poll_interval * 1000)):
+            for _, path in changes:
+                self._candidates[path] = None  # Restart the settle timer
+
+    def _stat_tree(self) -> Dict[str, Tuple[int, int]]:
+        signatures = {}
+        for path in self.matcher.walk(self.folder_path):
+            try:
+                st = os.stat(path)
+                signatures[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+        return signatures
+
+    async def _poll(self):
+        known = await run.io_bound(self._stat_tree)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = await run.io_bound(self._stat_tree)
+            for path, signature in current.items():
+                if known.get(path) != signature:
+                    self._candidates.setdefault(path, None)
+            known = current
+
+    @staticmethod
+    def _stat_paths(paths) -> Dict[str, Tuple[int, int]]:
+        signatures = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+                signatures[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+        return signatures
+
+    async def _settle_loop(self):
+        """Hand over files whose size and mtime stopped changing."""
+        while True:
+            await asyncio.sleep(min(1.0, self.settle_seconds))
+            if not self._candidates:
+                continue
+            paths = list(self._candidates)
+            signatures = await run.io_bound(self._stat_paths, paths)
+            now = time.monotonic()
+            for path in paths:
+                if path not in self._candidates:
+                    continue
+                signature = signatures.get(path)
+                if signature is None:
+                    del self._candidates[path]  # Gone or unreadable
+                    continue
+                previous = self._candidates[path]
+                if previous is None or previous[0] != signature:
+                    self._candidates[path] = (signature, now)
+                elif now - previous[1] >= self.settle_seconds:
+                    del self._candidates[path]
+                    try:
+                        await self.on_file(path)
+                    except Exception as e:
+                        logger.error(f"Error queueing watched file {path}: {e}")
@@ -0,0 +1,289 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger("pdf_purger")
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE_STATUSES = ("purged", "skipped", "failed")
+
+
+class WorkItem(NamedTuple):
+    id: int
+    folder: str
+    path: str
+    attempts: int
+    temp: Optional[str]
+
+
+class JobQueue(ABC):
+    """Shared queue of files to purge, claimed by worker nodes under time-limited leases.
+
+    Every file is published once; its final status doubles as the shared
+    record of processed files, so no two nodes process the same file.
+    A lease that is not renewed expires and the item is handed out again.
+    """
+    @abstractmethod
+    def publish(self, folder: str, paths: Iterable[str]) -> int:
+        """Queue files that have never been published; returns how many were new."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1,
+              folder: Optional[str] = None) -> List[WorkItem]:
+        """Lease up to limit queued (or expired) items to worker_id, optionally from one folder."""
+
+    @abstractmethod
+    def set_temp(self, item_id: int, worker_id: str, temp: str):
+        """Record the temp file a leased item is written through."""
+
+    @abstractmethod
+    def renew(self, item_ids: Iterable[int], worker_id: str, lease_seconds: float) -> List[int]:
+        """Extend leases still held by worker_id; returns the ids that were renewed."""
+
+    @abstractmethod
+    def complete(self, item_id: int, worker_id: str, status: str, message: str = "") -> bool:
+        """Record a final status; False if the lease was lost to another node."""
+
+    @abstractmethod
+    def release(self, item_id: int, worker_id: str, message: str = "") -> bool:
+        """Give a leased item back to the queue for a later retry."""
+
+    @abstractmethod
+    def is_known(self, path: str) -> bool:
+        """Check whether a file has been published (in any status)."""
+
+    @abstractmethod
+    def counts(self, folder: Optional[str] = None) -> Dict[str, int]:
+        """Number of items per status, optionally for one folder."""
+
+
+class MemoryJobQueue(JobQueue):
+    """In-process JobQueue, a stand-in for the shared queue in tests and single-node runs."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[int, Dict] = {}
+        self._by_path: Dict[str, int] = {}
+
+    def publish(self, folder: str, paths: Iterable[str]) -> int:
+        added = 0
+        with self._lock:
+            for path in paths:
+                if path in self._by_path:
+                    continue
+                item_id = len(self._items) + 1
+                self._items[item_id] = {'folder': folder, 'path': path, 'status': QUEUED, 'worker': None,
+                                        'lease_expires': 0.0, 'attempts': 0, 'temp': None, 'message': ''}
+                self._by_path[path] = item_id
+                added += 1
+        return added
+
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1,
+              folder: Optional[str] = None) -> List[WorkItem]:
+        now = time.time()
+        claimed = []
+        with self._lock:
+            for item_id, item in self._items.items():
+                if len(claimed) >= limit:
+                    break
+                if folder is not None and item['folder'] != folder:
+                    continue
+                if item['status'] == QUEUED or (item['status'] == LEASED and item['lease_expires'] < now):
+                    item.update(status=LEASED, worker=worker_id, lease_expires=now + lease_seconds,
+                                attempts=item['attempts'] + 1)
+                    claimed.append(WorkItem(item_id, item['folder'], item['path'], item['attempts'], item['temp']))
+        return claimed
+
+    def _held(self, item_id: int, worker_id: str) -> Optional[Dict]:
+        item = self._items.get(item_id)
+        if item and item['status'] == LEASED and item['worker'] == worker_id:
+            return item
+        return None
+
+    def set_temp(self, item_id: int, worker_id: str, temp: str):
+        with self._lock:
+            item = self._held(item_id, worker_id)
+            if item:
+                item['temp'] = temp
+
+    def renew(self, item_ids: Iterable[int], worker_id: str, lease_seconds: float) -> List[int]:
+        renewed = []
+        with self._lock:
+            for item_id in item_ids:
+                item = self._held(item_id, worker_id)
+                if item:
+                    item['lease_expires'] = time.time() + lease_seconds
+                    renewed.append(item_id)
+        return renewed
+
+    def complete(self, item_id: int, worker_id: str, status: str, message: str = "") -> bool:
+        with self._lock:
+            item = self._held(item_id, worker_id)
+            if not item:
+                return False
+            item.update(status=status, worker=None, temp=None, message=message)
+            return True
+
+    def release(self, item_id: int, worker_id: str, message: str = "") -> bool:
+        with self._lock:
+            item = self._held(item_id, worker_id)
+            if not item:
+                return False
+            item.update(status=QUEUED, worker=None, lease_expires=0.0, message=message)
+            return True
+
+    def is_known(self, path: str) -> bool:
+        with self._lock:
+            return path in self._by_path
+
+    def counts(self, folder: Optional[str] = None) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for item in self._items.values():
+                if folder is None or item['folder'] == folder:
+                    counts[item['status']] = counts.get(item['status'], 0) + 1
+        return counts
+
+
+class SQLiteJobQueue(JobQueue):
+    """JobQueue stored in a SQLite file that every node can reach, e.g. on the share.
+
+    Uses rollback journalling rather than WAL, which does not work over
+    network filesystems, and BEGIN IMMEDIATE so claims are serialised
+    between hosts. Lease times use wall-clock time, so node clocks must
+    be roughly in sync; keep leases well above the expected skew.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY,
+            folder TEXT NOT NULL,
+            path TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL,
+            worker TEXT,
+            lease_expires REAL NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            temp TEXT,
+            message TEXT NOT NULL DEFAULT '',
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS items_claim ON items (status, lease_expires);
+        CREATE INDEX IF NOT EXISTS items_folder ON items (folder, status);
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            self._local.conn = conn
+        return conn
+
+    class _Transaction:
+        def __init__(self, conn: sqlite3.Connection):
+            self.conn = conn
+
+        def __enter__(self) -> sqlite3.Connection:
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb):
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _transaction(self) -> "_Transaction":
+        return self._Transaction(self._connection())
+
+    def publish(self, folder: str, paths: Iterable[str]) -> int:
+        now = time.time()
+        rows = [(folder, path, QUEUED, now) for path in paths]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (folder, path, status, updated) VALUES (?, ?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1,
+              folder: Optional[str] = None) -> List[WorkItem]:
+        now = time.time()
+        query = ("SELECT id, folder, path, attempts, temp FROM items "
+                 "WHERE (status = ? OR (status = ? AND lease_expires < ?))")
+        params = [QUEUED, LEASED, now]
+        if folder is not None:
+            query += " AND folder = ?"
+            params.append(folder)
+        with self._transaction() as conn:
+            rows = conn.execute(query + " ORDER BY id LIMIT ?", params + [limit]).fetchall()
+            conn.executemany(
+                "UPDATE items SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated = ? WHERE id = ?",
+                [(LEASED, worker_id, now + lease_seconds, now, row[0]) for row in rows]
+            )
+        return [WorkItem(row[0], row[1], row[2], row[3] + 1, row[4]) for row in rows]
+
+    def set_temp(self, item_id: int, worker_id: str, temp: str):
+        with self._transaction() as conn:
+            conn.execute("UPDATE items SET temp = ? WHERE id = ? AND status = ? AND worker = ?",
+                         (temp, item_id, LEASED, worker_id))
+
+    def renew(self, item_ids: Iterable[int], worker_id: str, lease_seconds: float) -> List[int]:
+        now = time.time()
+        renewed = []
+        with self._transaction() as conn:
+            for item_id in item_ids:
+                cursor = conn.execute(
+                    "UPDATE items SET lease_expires = ?, updated = ? WHERE id = ? AND status = ? AND worker = ?",
+                    (now + lease_seconds, now, item_id, LEASED, worker_id)
+                )
+                if cursor.rowcount:
+                    renewed.append(item_id)
+        return renewed
+
+    def complete(self, item_id: int, worker_id: str, status: str, message: str = "") -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET status = ?, worker = NULL, temp = NULL, message = ?, updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (status, message, time.time(), item_id, LEASED, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def release(self, item_id: int, worker_id: str, message: str = "") -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET status = ?, worker = NULL, lease_expires = 0, message = ?, updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (QUEUED, message, time.time(), item_id, LEASED, worker_id)
+            )
+            return cursor.rowcount > 0
+
+    def is_known(self, path: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM items WHERE path = ?", (path,)).fetchone()
+        return row is not None
+
+    def counts(self, folder: Optional[str] = None) -> Dict[str, int]:
+        if folder is None:
+            rows = self._connection().execute("SELECT status, COUNT(*) FROM items GROUP BY status")
+        else:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM items WHERE folder = ? GROUP BY status", (folder,)
+            )
+        return {status: count for status, count in rows}
+
+
+def open_job_queue(location: str) -> JobQueue:
+    """Open the shared queue named in the job_queue_path setting."""
+    if location == ":memory:":
+        return MemoryJobQueue()
+    os.makedirs(os.path.dirname(os.path.abspath(location)), exist_ok=True)
+    logger.info(f"Using shared job queue {location}")
+    return SQLiteJobQueue(location)
@@ -0,0 +1,95 @@
+import time
+import uuid
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+from core.loop_monitor import loop_monitor
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Counters summed over the progress of each folder in a job
+COUNTERS = ('total_files', 'processed_files', 'bytes_read', 'bytes_written', 'cache_hits')
+
+# Worker pool counters reported as the change since the job started
+POOL_COUNTERS = ('timeouts', 'replaced', 'recycled_files', 'recycled_memory')
+
+class Job:
+    """A purge run over one or more folders, with its own state and cancellation token.
+
+    Passed wherever a process manager was expected: is_processing() turns
+    False once the job is cancelled, and files not started yet are skipped.
+    """
+    def __init__(self, folders: List[str], options: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.folders = list(folders)
+        self.options = dict(options or {})
+        self.state = QUEUED
+        self.cancel_requested = False
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.progress: Dict[str, Any] = {}  # folder -> ProgressManager
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._pool_stats: Optional[Callable[[], Dict[str, int]]] = None
+        self._pool_start: Dict[str, int] = {}
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def is_processing(self) -> bool:
+        """Check if the job should keep processing files."""
+        return not self.cancel_requested and not self.is_finished
+
+    def start(self, pool_stats: Optional[Callable[[], Dict[str, int]]] = None):
+        """Mark the job running; pool_stats reads the purge pool's counters for worker_stats()."""
+        self.state = RUNNING
+        self.started = time.time()
+        self._pool_stats = pool_stats
+        self._pool_start = pool_stats() if pool_stats else {}
+
+    def cancel(self) -> bool:
+        """Ask the job to stop after the files in flight; False if already finished."""
+        if self.is_finished or self.cancel_requested:
+            return False
+        self.cancel_requested = True
+        return True
+
+    def finish(self, state: str):
+        self.state = state
+        self.finished = time.time()
+
+    def counters(self) -> Dict[str, int]:
+        return {name: sum(getattr(progress, name, 0) for progress in self.progress.values())
+                for name in COUNTERS}
+
+    def worker_stats(self) -> Dict[str, int]:
+        """Worker timeouts and recycling while the job ran; shared with jobs running alongside."""
+        if self._pool_stats is None:
+            return {}
+        stats = self._pool_stats()
+        for name in POOL_COUNTERS:
+            stats[name] -= self._pool_start.get(name, 0)
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'state': self.state,
+            'cancel_requested': self.cancel_requested,
+            'folders': self.folders,
+            'options': self.options,
+            'counters': self.counters(),
+            'loop_lag_ms': loop_monitor.percentiles(),
+            'workers': self.worker_stats(),
+            'results': self.results,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
@@ -0,0 +1,57 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger("pdf_purger")
+
+class LoopLagMonitor:
+    """Sample how late the event loop runs a timer, as a measure of loop starvation.
+
+    One sleep per interval, so the overhead is negligible. Keeps the last
+    window samples and logs at most one warning a minute when a sample
+    exceeds warn_ms.
+    """
+    def __init__(self, interval: float = 0.5, window: int = 600, warn_ms: float = 250.0):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self._samples = deque(maxlen=window)
+        self._last_warning = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - scheduled) * 1000
+            self._samples.append(lag_ms)
+            if lag_ms > self.warn_ms and time.monotonic() - self._last_warning > 60:
+                self._last_warning = time.monotonic()
+                logger.warning(f"Event loop lagging: timer ran {lag_ms:.0f} ms late ({self.format()})")
+
+    def percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99/max of the recent lag samples, in milliseconds."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {}
+        def pick(fraction: float) -> float:
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 1)
+        return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': round(samples[-1], 1)}
+
+    def format(self) -> str:
+        stats = self.percentiles()
+        return ", ".join(f"{name} {value} ms" for name, value in stats.items()) or "no samples"
+
+# One monitor per process, started with the app
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,174 @@
+import os
+import mmap
+import array
+import bisect
+import struct
+import hashlib
+import logging
+from typing import Iterable, Optional, Set
+
+logger = logging.getLogger("pdf_purger")
+
+# Index file: magic, size of the text file it covers, entry count, then sorted hashes
+_MAGIC = b"PPIDX001"
+_HEADER = struct.Struct("<8sQQ")
+
+def path_hash(relative: str) -> int:
+    """64-bit hash of a root-relative path."""
+    digest = hashlib.blake2b(relative.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+class PathIndex:
+    """Set of paths below a root, kept as sorted 64-bit hashes of their relative paths.
+
+    Backed by a line-per-path text file (absolute or relative paths, with
+    an optional tab-separated suffix) and a binary .idx file next to it
+    that is memory-mapped on load, so nothing is parsed unless the text
+    file grew since the index was written. New paths go to a small set
+    until save() merges them into the index. At 8 bytes per path the
+    chance of any hash collision stays below one in a million for
+    several million paths.
+    """
+    def __init__(self, root: str, text_path: str):
+        self.root = os.path.normcase(os.path.abspath(root))
+        self._prefix = self.root.rstrip(os.sep) + os.sep
+        self.text_path = text_path
+        self.index_path = os.path.splitext(text_path)[0] + ".idx"
+        self._base = array.array('Q')
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = None
+        self._added: Set[int] = set()
+        self._covered = 0  # Bytes of the text file represented by the index
+        self._dirty = False
+        self._load()
+
+    def relative(self, path: str) -> str:
+        """Root-relative form of a path, with forward slashes."""
+        path = os.path.normcase(path)
+        if path.startswith(self._prefix):
+            path = path[len(self._prefix):]
+        elif os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        return path.replace(os.sep, '/')
+
+    def __contains__(self, path: str) -> bool:
+        h = path_hash(self.relative(path))
+        if h in self._added:
+            return True
+        i = bisect.bisect_left(self._base, h)
+        return i < len(self._base) and self._base[i] == h
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._added)
+
+    def add(self, path: str) -> bool:
+        """Add a path; False if it was already present."""
+        if path in self:
+            return False
+        self._added.add(path_hash(self.relative(path)))
+        self._dirty = True
+        return True
+
+    def _hash_lines(self, data: bytes) -> Iterable[int]:
+        for line in data.decode('utf-8', 'surrogateescape').splitlines():
+            path = line.partition('\t')[0].strip()
+            if path:
+                yield path_hash(self.relative(path))
+
+    def _load(self):
+        text_size = os.path.getsize(self.text_path) if os.path.exists(self.text_path) else 0
+        try:
+            self._map_index(text_size)
+        except (OSError, ValueError) as e:
+            logger.info(f"Rebuilding {os.path.basename(self.index_path)}: {e}")
+            self._release()
+            self._covered = 0
+
+        if text_size > self._covered:
+            # Paths appended since the index was written, or the whole file
+            with open(self.text_path, 'rb') as f:
+                f.seek(self._covered)
+                tail = f.read()
+            hashes = set(self._hash_lines(tail))
+            if self._covered == 0:
+                self._base = array.array('Q', sorted(hashes))
+            else:
+                self._added.update(hashes)
+            self._covered = text_size
+            self._dirty = True
+            try:
+                self.save()
+            except OSError as e:
+                # The index stays usable from memory; the next load retries the write
+                logger.warning(f"Could not save {self.index_path}: {e}")
+
+    def _map_index(self, text_size: int):
+        if not os.path.exists(self.index_path):
+            raise ValueError("no index yet")
+        self._file = open(self.index_path, 'rb')
+        header = self._file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError("index is truncated")
+        magic, covered, count = _HEADER.unpack(header)
+        if magic != _MAGIC or covered > text_size:
+            raise ValueError("index does not match its text file")
+        if os.fstat(self._file.fileno()).st_size != _HEADER.size + 8 * count:
+            raise ValueError("index size does not match its header")
+        if count:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._base = memoryview(self._mmap)[_HEADER.size:].cast('Q')
+        self._covered = covered
+
+    def _release(self):
+        if isinstance(self._base, memoryview):
+            self._base.release()
+            self._base = array.array('Q')
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _merged(self) -> array.array:
+        """The base hashes with the added ones merged in, copying runs of the base whole."""
+        merged = array.array('Q')
+        start = 0
+        for h in sorted(self._added):
+            i = bisect.bisect_left(self._base, h, start)
+            merged.frombytes(self._base[start:i].tobytes())
+            merged.append(h)
+            start = i + 1 if i < len(self._base) and self._base[i] == h else i
+        merged.frombytes(self._base[start:].tobytes())
+        return merged
+
+    def save(self):
+        """Merge added paths into the index file, if there are any."""
+        if not self._dirty:
+            return
+        merged = self._merged()
+        self._release()
+        # Kept in memory first, so a failed write leaves the index usable
+        self._base = merged
+        self._added.clear()
+        temp_path = self.index_path + ".temp"
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self._covered, len(merged)))
+            f.write(merged.tobytes())
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+
+    @property
+    def covered(self) -> int:
+        return self._covered
+
+    def record_appended(self, num_bytes: int):
+        """Account for bytes this process appended to the text file itself."""
+        self._covered += num_bytes
+
+    def close(self):
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning(f"Could not save {self.index_path}: {e}")
+        self._release()
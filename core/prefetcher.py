@@ -0,0 +1,95 @@
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Iterable, Optional, Set
+from nicegui import run
+
+logger = logging.getLogger("pdf_purger")
+
+# Chunk size for warming the cache by reading
+READ_CHUNK = 1 << 20
+
+def warm_file(path: str) -> int:
+    """Get a file into the OS page cache ahead of its worker; returns its size.
+
+    posix_fadvise(WILLNEED) starts the read-ahead without blocking where
+    the platform has it. Elsewhere the file is read and the data dropped,
+    which leaves it in the cache of the local or network client.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+        else:
+            while os.read(fd, READ_CHUNK):
+                pass
+        return size
+    finally:
+        os.close(fd)
+
+class ReadAheadPrefetcher:
+    """Warm the next files of a run while the workers purge the current ones.
+
+    Files are warmed in queue order, at most depth files and budget bytes
+    ahead of the workers; a file's share is freed once done() reports it
+    finished. Warming is best effort, a file that cannot be read here is
+    simply left for its worker to fail on.
+    """
+    def __init__(self, depth: int, budget_bytes: int):
+        self.depth = max(1, int(depth))
+        self.budget_bytes = max(0, int(budget_bytes))
+        self._pending = deque()
+        self._warmed: Dict[str, int] = {}
+        self._finished: Set[str] = set()
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.files_warmed = 0
+        self.bytes_warmed = 0
+
+    def extend(self, paths: Iterable[str]):
+        """Queue files in the order the workers will take them."""
+        self._pending.extend(paths)
+        self._changed.set()
+
+    def done(self, path: str):
+        """A worker is finished with path."""
+        if self._warmed.pop(path, None) is None:
+            self._finished.add(path)  # Taken before it was warmed; do not warm it now
+        self._changed.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        logger.info(f"Read-ahead warmed {self.files_warmed} files ({self.bytes_warmed / 1e6:.1f} MB)")
+
+    def _has_room(self) -> bool:
+        return (len(self._warmed) < self.depth and
+                (not self._warmed or sum(self._warmed.values()) < self.budget_bytes))
+
+    async def _run(self):
+        while True:
+            self._changed.clear()
+            while self._pending and self._has_room():
+                path = self._pending.popleft()
+                if path in self._finished:
+                    self._finished.discard(path)
+                    continue
+                try:
+                    size = await run.io_bound(warm_file, path)
+                except OSError as e:
+                    logger.debug(f"Could not prefetch {path}: {e}")
+                    continue
+                if path in self._finished:
+                    self._finished.discard(path)  # Finished while it was being warmed
+                    continue
+                self._warmed[path] = size
+                self.files_warmed += 1
+                self.bytes_warmed += size
+            await self._changed.wait()
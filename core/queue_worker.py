@@ -0,0 +1,191 @@
+import os
+import socket
+import asyncio
+import logging
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from nicegui import run
+from core.job_queue import JobQueue, WorkItem
+
+logger = logging.getLogger("pdf_purger")
+
+def default_worker_id() -> str:
+    """Identify this purger instance in the shared queue."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LogProgress:
+    """Progress target for worker nodes without a page: messages go to the log."""
+    def update(self, progress_data: Dict):
+        if 'message' in progress_data:
+            logger.info(progress_data['message'])
+
+class LeaseJournal:
+    """Stands in for RunJournal when files come from the shared queue.
+
+    Temp files are recorded on the item's lease instead of a local journal,
+    so whichever node picks up an expired lease can remove them.
+    """
+    def __init__(self, job_queue: JobQueue, worker_id: Optional[str] = None):
+        self.job_queue = job_queue
+        self.worker_id = worker_id or default_worker_id()
+        self._items: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def track(self, item: WorkItem):
+        self._items[item.path] = item.id
+
+    def started(self, file_path: str, temp_file: str):
+        item_id = self._items.get(file_path)
+        if item_id is not None:
+            # Kept referenced until written, and a failure logged: the lease then just lacks the temp
+            task = asyncio.create_task(run.io_bound(self.job_queue.set_temp, item_id, self.worker_id, temp_file))
+            self._tasks.add(task)
+            task.add_done_callback(partial(self._temp_recorded, file_path))
+
+    def _temp_recorded(self, file_path: str, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Could not record the temp file of {file_path} on its lease: {task.exception()}")
+
+    def done(self, file_path: str):
+        self._items.pop(file_path, None)
+
+class QueueOutcomes:
+    """Stands in for FileTracker when files come from the shared queue.
+
+    The queue's item status is the record of processed files there, so
+    outcomes are only held until process_item reports them to the queue.
+    Nothing goes to the folder's tracking files, and a file released
+    after a stop leaves no trace on this node.
+    """
+    def __init__(self):
+        self._outcomes: Dict[str, Tuple[str, str]] = {}
+
+    def is_processed(self, file_path: str) -> bool:
+        return file_path in self._outcomes
+
+    def status(self, file_path: str) -> Optional[str]:
+        outcome = self._outcomes.get(file_path)
+        return outcome[0] if outcome else None
+
+    async def mark_purged(self, file_path: str):
+        self._outcomes[file_path] = ("purged", "")
+
+    async def mark_skipped(self, file_path: str):
+        self._outcomes[file_path] = ("skipped", "")
+
+    async def mark_failed(self, file_path: str, reason: str):
+        self._outcomes[file_path] = ("failed", " ".join(reason.split()))
+
+    def take(self, file_path: str) -> Optional[Tuple[str, str]]:
+        """Status and message recorded for a file, forgetting them."""
+        return self._outcomes.pop(file_path, None)
+
+class QueueWorker:
+    """Claim items from a shared JobQueue and process them under renewed leases.
+
+    process_item returns the final status for an item ("purged", "skipped"
+    or "failed") with a message, or None to hand the item back to the queue.
+    Leases are renewed every third of lease_seconds while items are in
+    flight, so only a node that stops responding loses its items.
+    """
+    def __init__(self, journal: LeaseJournal,
+                 process_item: Callable[[WorkItem], Awaitable[Optional[Tuple[str, str]]]],
+                 concurrency: int, lease_seconds: float = 120.0, poll_interval: float = 5.0,
+                 max_claims: int = 4, folder: Optional[str] = None):
+        self.job_queue = journal.job_queue
+        self.worker_id = journal.worker_id
+        self.journal = journal
+        self.process_item = process_item
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_claims = max_claims
+        self.folder = folder
+        self._in_flight: Dict[int, WorkItem] = {}
+
+    async def run(self, should_stop: Callable[[], bool], drain: bool = False):
+        """Claim and process items until should_stop() is true.
+
+        With drain, also return once nothing is queued or leased for this
+        worker's folder, including leases held by other nodes.
+        """
+        renew_task = asyncio.create_task(self._renew_leases())
+        tasks = set()
+        try:
+            while not should_stop():
+                free = self.concurrency - len(tasks)
+                items = []
+                if free > 0:
+                    items = await run.io_bound(self.job_queue.claim, self.worker_id, self.lease_seconds,
+                                               free, self.folder)
+                    for item in items:
+                        task = asyncio.create_task(self._run_item(item))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+
+                if not items and not tasks and drain:
+                    counts = await run.io_bound(self.job_queue.counts, self.folder)
+                    if not counts.get('queued') and not counts.get('leased'):
+                        break
+
+                if tasks:
+                    await asyncio.wait(tasks, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    await asyncio.sleep(self.poll_interval)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            renew_task.cancel()
+
+    async def _run_item(self, item: WorkItem):
+        self._in_flight[item.id] = item
+        self.journal.track(item)
+        try:
+            if item.temp:
+                await run.io_bound(self._remove_stale_temp, item.temp)
+            if item.attempts > self.max_claims:
+                result = ("failed", f"gave up after {item.attempts - 1} unfinished claims")
+            else:
+                result = await self.process_item(item)
+        except Exception as e:
+            logger.error(f"Error processing queued file {item.path}: {e}")
+            result = None
+        finally:
+            self._in_flight.pop(item.id, None)
+            self.journal.done(item.path)
+
+        if result is None:
+            await run.io_bound(self.job_queue.release, item.id, self.worker_id)
+            return
+        status, message = result
+        if not await run.io_bound(self.job_queue.complete, item.id, self.worker_id, status, message):
+            logger.warning(f"Lease on {item.path} was lost before completion; result not recorded")
+
+    @staticmethod
+    def _remove_stale_temp(temp_file: str):
+        """Remove the temp file left by a node whose lease expired."""
+        try:
+            os.remove(temp_file)
+            logger.info(f"Removed stale temp file {temp_file}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove stale temp file {temp_file}: {e}")
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            item_ids = list(self._in_flight)
+            if not item_ids:
+                continue
+            try:
+                renewed = await run.io_bound(self.job_queue.renew, item_ids, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Could not renew leases: {e}")
+                continue
+            for item_id in set(item_ids) - set(renewed):
+                item = self._in_flight.get(item_id)
+                if item:
+                    logger.warning(f"Lease on {item.path} expired and may be processed by another node")
@@ -0,0 +1,25 @@
+import errno
+import random
+from concurrent.futures.process import BrokenProcessPool
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# OS errors that say the file itself is unusable rather than the storage being flaky
+_PERMANENT_ERRNOS = {errno.ENOENT, errno.EISDIR, errno.ENOTDIR, errno.EINVAL, errno.ENAMETOOLONG}
+
+
+def classify_exception(exc: BaseException) -> str:
+    """Sort a processing failure into transient (worth retrying) or permanent."""
+    if isinstance(exc, (BrokenProcessPool, TimeoutError, ConnectionError)):
+        return TRANSIENT
+    if isinstance(exc, (FileNotFoundError, IsADirectoryError, NotADirectoryError)):
+        return PERMANENT
+    if isinstance(exc, OSError):
+        return PERMANENT if exc.errno in _PERMANENT_ERRNOS else TRANSIENT
+    return PERMANENT
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given 1-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
@@ -0,0 +1,171 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("pdf_purger")
+
+class RunJournal:
+    """Append-only journal of a folder run, kept in the folder's logs directory.
+
+    Records the queued files, the temp file each in-flight file is being
+    written to, and the files that are done, so an interrupted run can be
+    cleaned up and resumed without rescanning the folder.
+
+    started(), done() and enqueue() are called from the event loop for
+    every file, so they only queue their entries; a writer thread writes
+    whatever has queued up in one go. A crash can lose the last entries:
+    a lost started entry leaves a stray temp file, a lost done entry
+    hands the file to the resumed run, which finds it already tracked.
+    """
+    FILENAME = "run_journal.jsonl"
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self.path = Path(folder_path) / "logs" / self.FILENAME
+        self._file = None
+        self._write_lock = threading.Lock()  # Held while writing the file
+        self._pending_lock = threading.Lock()
+        self._pending: List[str] = []
+        self._flush_queued = False
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    def _relative(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.folder_path)
+
+    def _absolute(self, relative: str) -> str:
+        return os.path.join(self.folder_path, relative)
+
+    def load(self) -> Optional[Dict]:
+        """Replay the journal into queued, in-flight and done state."""
+        if not self.path.exists():
+            return None
+        queued: List[str] = []
+        done = set()
+        in_flight: Dict[str, str] = {}
+        finished = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn write at the crash point
+                event = entry.get('event')
+                if event == 'queued':
+                    queued.extend(entry['files'])
+                elif event == 'started':
+                    in_flight[entry['file']] = entry['temp']
+                elif event == 'done':
+                    done.add(entry['file'])
+                    in_flight.pop(entry['file'], None)
+                elif event == 'finished':
+                    finished = True
+        return {'queued': queued, 'done': done, 'in_flight': in_flight, 'finished': finished}
+
+    def recover(self) -> Optional[List[str]]:
+        """Clean up after an interrupted run and return the files still to do.
+
+        Returns None when there is no journal, and an empty list when the
+        last run finished cleanly.
+        """
+        state = self.load()
+        if state is None:
+            return None
+        if state['finished']:
+            return []
+
+        for temp in state['in_flight'].values():
+            try:
+                os.remove(self._absolute(temp))
+                logger.info(f"Removed leftover temp file {temp}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not delete temp file {temp}: {e}")
+
+        # Files that were in flight go first, then the rest in queue order
+        remaining = list(state['in_flight'])
+        seen = set(remaining) | state['done']
+        remaining.extend(f for f in state['queued'] if f not in seen)
+        return [self._absolute(f) for f in remaining]
+
+    def _write(self, lines: List[str]):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write("".join(lines))
+        self._file.flush()
+
+    def _take_pending(self) -> List[str]:
+        with self._pending_lock:
+            lines, self._pending = self._pending, []
+            self._flush_queued = False
+        return lines
+
+    def _flush(self):
+        """Write the queued entries."""
+        with self._write_lock:
+            lines = self._take_pending()
+            if lines:
+                self._write(lines)
+
+    def _flushed(self, future: Future):
+        if future.exception() is not None:
+            logger.warning(f"Could not write run journal {self.path}: {future.exception()}")
+
+    def _queue(self, entry: Dict):
+        """Queue an entry for the writer thread."""
+        with self._pending_lock:
+            self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._flush_queued:
+                return
+            self._flush_queued = True
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='run-journal')
+        self._writer.submit(self._flush).add_done_callback(self._flushed)
+
+    def _append(self, entry: Dict):
+        """Write an entry now, after the queued ones."""
+        with self._write_lock:
+            lines = self._take_pending()
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._write(lines)
+
+    def begin(self, files: List[str]):
+        """Start a new journal for the given queue."""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._write_lock:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({'event': 'queued', 'files': [self._relative(f) for f in files]})
+
+    def enqueue(self, files: List[str]):
+        """Add files to the queue of a running journal."""
+        self._queue({'event': 'queued', 'files': [self._relative(f) for f in files]})
+
+    def started(self, file_path: str, temp_file: str):
+        """Record that a file is being written through temp_file."""
+        self._queue({'event': 'started', 'file': self._relative(file_path),
+                     'temp': self._relative(temp_file)})
+
+    def done(self, file_path: str):
+        """Record that a file needs no more work in this run."""
+        self._queue({'event': 'done', 'file': self._relative(file_path)})
+
+    def finish(self):
+        """Mark the run as completed."""
+        self._append({'event': 'finished'})
+        self.close()
+
+    def close(self):
+        """Write what is still queued and close the file; blocks, so call it off the event loop."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        self._flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
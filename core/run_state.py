@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Optional
+from nicegui import run
+
+logger = logging.getLogger("pdf_purger")
+
+RUN_STATE_FILE = Path('run_state.json')
+
+# Messages kept per folder for pages that reconnect
+MAX_MESSAGES = 200
+
+MESSAGE_PREFIXES = {
+    'info': 'ℹ️',
+    'warning': '⚠️',
+    'error': '❌',
+    'success': '✅'
+}
+
+class RunStateStore:
+    """Latest progress of every folder, kept in memory and fed from the event bus.
+
+    Pages read a folder's state when they connect instead of going through
+    app.storage.user, which NiceGUI persists on every change. The store is
+    written to disk every interval seconds when something changed, and on
+    shutdown, so the last state survives a restart.
+    """
+    def __init__(self, path: Path = RUN_STATE_FILE, interval: float = 10.0):
+        self.path = Path(path)
+        self.interval = interval
+        self._folders: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self):
+        """Read the last snapshot, if there is one."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                folders = json.load(f).get('folders', {})
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not read run state from {self.path}: {e}")
+            return
+        for folder, state in folders.items():
+            state['messages'] = deque(state.get('messages', []), maxlen=MAX_MESSAGES)
+            self._folders[folder] = state
+
+    def record(self, event: Dict):
+        """Apply one progress event to its folder's state."""
+        folder = event.get('folder')
+        if not folder or event.get('type') == 'job':
+            return
+        state = self._folders.get(folder)
+        if state is None:
+            state = self._folders[folder] = {'progress': 0.0, 'text': '', 'job': None,
+                                             'messages': deque(maxlen=MAX_MESSAGES)}
+        if event.get('job') and event['job'] != state['job']:
+            # A new run starts with a clean log
+            state.update(job=event['job'], progress=0.0, text='')
+            state['messages'].clear()
+        if 'progress' in event:
+            state['progress'] = event['progress']
+        if 'message' in event:
+            message_type = event.get('type', 'info')
+            prefix = MESSAGE_PREFIXES.get(message_type, '')
+            state['messages'].append(f"{prefix} {event['message']}" if prefix else event['message'])
+            if message_type != 'progress':
+                state['text'] = event['message']
+        state['updated'] = event.get('time', time.time())
+        self._dirty = True
+
+    def get(self, folder_path: str) -> Dict[str, Any]:
+        """Copy of a folder's state; empty if nothing was recorded for it."""
+        state = self._folders.get(os.path.abspath(folder_path))
+        if state is None:
+            return {}
+        return dict(state, messages=list(state['messages']))
+
+    def clear(self, folder_path: Optional[str] = None):
+        """Forget one folder's state, or every folder's."""
+        if folder_path is None:
+            self._folders.clear()
+        else:
+            self._folders.pop(os.path.abspath(folder_path), None)
+        self._dirty = True
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {'folders': {folder: dict(state, messages=list(state['messages']))
+                            for folder, state in self._folders.items()}}
+
+    def _write(self, snapshot: Dict[str, Any]):
+        temp_path = self.path.with_name(self.path.name + ".temp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    async def save(self):
+        """Write a snapshot if anything changed since the last one."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await run.io_bound(self._write, self._snapshot())
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"Could not save run state to {self.path}: {e}")
+
+    def save_now(self):
+        """Write a snapshot synchronously, for shutdown."""
+        if self._dirty:
+            try:
+                self._write(self._snapshot())
+                self._dirty = False
+            except Exception as e:
+                logger.warning(f"Could not save run state to {self.path}: {e}")
+
+    def start(self, events):
+        """Follow the event bus and snapshot periodically."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(events))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.save_now()
+
+    async def _run(self, events):
+        subscription = events.subscribe()
+        loop = asyncio.get_running_loop()
+        next_save = loop.time() + self.interval
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), max(0.0, next_save - loop.time()))
+                    self.record(event)
+                except asyncio.TimeoutError:
+                    pass
+                if loop.time() >= next_save:
+                    await self.save()
+                    next_save = loop.time() + self.interval
+        finally:
+            events.unsubscribe(subscription)
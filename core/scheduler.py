@@ -0,0 +1,139 @@
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("pdf_purger")
+
+# Share of the worker pool per priority class; urgent work is served first
+PRIORITY_WEIGHTS = {'high': 4, 'normal': 2, 'low': 1}
+URGENT = "urgent"
+PRIORITIES = (URGENT,) + tuple(PRIORITY_WEIGHTS)
+DEFAULT_PRIORITY = "normal"
+
+
+class _Waiter:
+    __slots__ = ('key', 'priority', 'since', 'future')
+
+    def __init__(self, key: str, priority: str, future: asyncio.Future):
+        self.key = key
+        self.priority = priority
+        self.since = time.monotonic()
+        self.future = future
+
+
+class FairShareScheduler:
+    """Weighted fair-share scheduling of the worker slots shared by all jobs.
+
+    Every freed slot goes to a waiting urgent request first, so urgent work
+    starts within one file-time. The other slots are shared between the
+    waiting runs in proportion to their priority weight (stride
+    scheduling), and a request waiting longer than max_wait is treated as
+    urgent, so low-priority work keeps moving.
+    """
+    def __init__(self, limit: int, max_wait: float = 60.0):
+        self._limit = max(1, int(limit))
+        self._active = 0
+        self.max_wait = max_wait
+        self._waiting: List[_Waiter] = []
+        self._pass: Dict[str, float] = {}
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    async def set_limit(self, limit: int):
+        """Change the number of slots; running files keep theirs when lowering."""
+        self._limit = max(1, int(limit))
+        self._dispatch()
+
+    def slots(self, key: str, priority: str = DEFAULT_PRIORITY) -> "ScheduledSlots":
+        """Async context manager that holds one slot for the run identified by key."""
+        if priority not in PRIORITIES:
+            logger.warning(f"Unknown priority {priority!r}, using {DEFAULT_PRIORITY}")
+            priority = DEFAULT_PRIORITY
+        return ScheduledSlots(self, key, priority)
+
+    async def acquire(self, key: str, priority: str = DEFAULT_PRIORITY):
+        if self._active < self._limit and not self._waiting:
+            self._grant(key, priority)
+            return
+        if key not in self._pass or not any(w.key == key for w in self._waiting):
+            # A run (re)joining starts at the current virtual time instead of
+            # cashing in the time it was idle
+            self._pass[key] = max(self._pass.get(key, 0.0), self._virtual_time())
+        waiter = _Waiter(key, priority, asyncio.get_running_loop().create_future())
+        self._waiting.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiting:
+                self._waiting.remove(waiter)
+            elif not waiter.future.cancelled():
+                self.release()  # The slot was granted as we were cancelled
+            raise
+
+    def release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def forget(self, key: str):
+        """Drop the accounting of a run that has finished."""
+        if not any(w.key == key for w in self._waiting):
+            self._pass.pop(key, None)
+
+    def _virtual_time(self) -> float:
+        passes = [self._pass[w.key] for w in self._waiting if w.key in self._pass]
+        return min(passes) if passes else 0.0
+
+    def _grant(self, key: str, priority: str):
+        self._active += 1
+        weight = PRIORITY_WEIGHTS.get(priority, PRIORITY_WEIGHTS['high'])
+        self._pass[key] = self._pass.get(key, 0.0) + 1.0 / weight
+
+    def _pick(self) -> _Waiter:
+        now = time.monotonic()
+        urgent = [w for w in self._waiting if w.priority == URGENT or now - w.since >= self.max_wait]
+        if urgent:
+            return min(urgent, key=lambda w: w.since)
+        return min(self._waiting, key=lambda w: (self._pass.get(w.key, 0.0), w.since))
+
+    def _dispatch(self):
+        while self._active < self._limit and self._waiting:
+            waiter = self._pick()
+            self._waiting.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._grant(waiter.key, waiter.priority)
+            waiter.future.set_result(None)
+
+
+class ScheduledSlots:
+    """Slots of a FairShareScheduler for one run; usable by many tasks at once."""
+    def __init__(self, scheduler: FairShareScheduler, key: str, priority: str):
+        self.scheduler = scheduler
+        self.key = key
+        self.priority = priority
+
+    async def __aenter__(self):
+        await self.scheduler.acquire(self.key, self.priority)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.scheduler.release()
+
+
+def resolve_priority(job_options: Dict, settings: Dict, folder_path: str) -> str:
+    """Priority of a folder run: the job's own, else the folder's configured one."""
+    priority: Optional[str] = job_options.get('priority')
+    if not priority:
+        priority = (settings.get('folder_priorities') or {}).get(folder_path)
+    return priority or DEFAULT_PRIORITY
@@ -1,20 +1,62 @@
 import json
 import logging
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List
 from nicegui import run
 
 logger = logging.getLogger("pdf_purger")
 
+STATE_FILE = Path('purger_state.json')
+
+# Processing options; values in the state file override these
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    'max_attempts': 4,
+    'quarantine_failures': False,
+    'watch_force_polling': None,  # None picks polling for network mounts
+    'include_patterns': ['bilag_*.pdf'],
+    'exclude_patterns': [],
+    'exclude_dirs': [],  # Subtrees that are never walked, e.g. "archive*" or "2019/old"
+    'output_mode': 'in_place',  # in_place, mirror, zip or tar
+    'output_path': '',  # Root for mirror trees and archives
+    'archive_patterns': ['*.zip'],  # Archives whose matching members are purged into name.purged.zip, via output_mode
+    'white_threshold': 0.95,  # Text and fills at or above this luminance (0-1) count as white
+    'job_queue_path': '',  # Shared queue (SQLite file reachable by all nodes); empty processes locally
+    'node_role': 'coordinator',  # coordinator scans and publishes folders, worker only claims queued files
+    'lease_seconds': 120,  # How long a claimed file stays leased without renewal
+    'worker_budget': 0,  # Files processed at once across all jobs; 0 uses the CPU count
+    'folder_priorities': {},  # Folder path -> urgent, high, normal or low; jobs may override
+    'priority_max_wait': 60,  # Seconds a file may wait for a slot before it is served as urgent
+    'asyncio_debug': False,  # Diagnostics only: asyncio debug mode and slow-callback logging
+    'profile_threshold': 0,  # Dump a profile to logs/profiles for files slower than this many seconds; 0 is off
+    'profile_sample_rate': 0.0,  # Fraction of files profiled regardless of time, e.g. 0.001
+    'prefetch_files': None,  # Files read ahead of the workers; None reads 8 ahead on network mounts only, 0 is off
+    'prefetch_mb': 256,  # Most data read ahead at once, in MB
+    'file_timeout': 300,  # Seconds a file may take before its worker is killed; 0 is no limit
+    'file_timeout_per_mb': 10,  # Extra seconds allowed per MB of input
+    'worker_max_files': 1000,  # Files a purge worker processes before it is replaced; 0 is never
+    'worker_max_memory_mb': 2000,  # Replace a purge worker once its memory passes this; 0 is never
+    'result_cache_dir': '',  # Results of purged inputs by content hash, reused for duplicate PDFs; empty is off
+    'result_cache_mb': 2048,  # Size the result cache is pruned to after each folder run
+    'result_cache_link': False,  # Hard-link cache hits instead of copying; only if nothing edits outputs in place
+    'progress_events_mb': 50,  # Stream per-page progress of files at least this large, in MB; 0 is never
+}
+
+def _read_state() -> Dict[str, Any]:
+    """Read the raw state file."""
+    if not STATE_FILE.exists():
+        return {}
+    with open(STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_state(state: Dict[str, Any]):
+    """Write the raw state file."""
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
 def load_state() -> List[str]:
     """Load folder paths from state file."""
     try:
-        state_file = Path('purger_state.json')
-        if not state_file.exists():
-            return []
-        with open(state_file, 'r', encoding='utf-8') as f:
-            state = json.load(f)
-            return state.get('folders', [])
+        return _read_state().get('folders', [])
     except Exception as e:
         logger.error(f"Error loading state: {e}")
         return []
@@ -22,10 +64,26 @@ def load_state() -> List[str]:
 def save_state(folder_paths: List[str]):
     """Save folder paths to state file."""
     try:
-        state_file = Path('purger_state.json')
-        state = {'folders': [str(path) for path in folder_paths if path]}
-        
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        state = _read_state()
+        state['folders'] = [str(path) for path in folder_paths if path]
+        _write_state(state)
     except Exception as e:
         logger.error(f"Error saving state: {e}")
+
+def load_settings() -> Dict[str, Any]:
+    """Load processing settings, filling in defaults."""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        settings.update(_read_state().get('settings', {}))
+    except Exception as e:
+        logger.error(f"Error loading settings: {e}")
+    return settings
+
+def save_settings(settings: Dict[str, Any]):
+    """Save processing settings to state file."""
+    try:
+        state = _read_state()
+        state['settings'] = dict(settings)
+        _write_state(state)
+    except Exception as e:
+        logger.error(f"Error saving settings: {e}")
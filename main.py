@@ -1,15 +1,36 @@
 import os
+import uuid
 import logging
 from nicegui import app, ui, run
 from app_ui.index_page import IndexPage
 from app_ui.process_page import ProcessPage
 from process_manager import ProcessManager
 from core.file_scanner import FileScanner
+from core.file_matcher import FileMatcher
+from core.folder_watcher import FolderWatcher, is_network_mount
 from core.file_tracker import FileTracker
 from core.progress_manager import ProgressManager
-from pdf_processor.processor import process_pdf_sync
-from core.state_manager import load_state
-from typing import Dict
+from core.concurrency_controller import AdaptiveLimiter, ConcurrencyController, NestedLimiter, default_worker_count
+from pdf_processor.core import process_pdf, get_worker_pool, shutdown_event_manager
+from pdf_processor.worker_pool import FileTimeout
+from pdf_processor.file_io import remove_temp
+from pdf_processor.result_cache import ResultCache
+from pdf_processor.sinks import create_sink
+from pdf_processor.processor import purge_pdf_bytes
+from pdf_processor.archives import ArchiveRewriter, purged_archive_path, PURGED_ARCHIVE_SUFFIX
+from core.state_manager import load_state, load_settings
+from core.run_journal import RunJournal
+from core.retry_policy import TRANSIENT, classify_exception, backoff_delay
+from core.job_queue import open_job_queue
+from core.queue_worker import QueueWorker, QueueOutcomes, LeaseJournal, LogProgress
+from core.event_bus import EventBus, ProgressPublisher
+from core.jobs import Job, COMPLETED, FAILED, CANCELLED
+from core.scheduler import FairShareScheduler, resolve_priority
+from core.loop_monitor import loop_monitor
+from core.run_state import RunStateStore
+from core.prefetcher import ReadAheadPrefetcher
+from app_api.job_api import register_job_api
+from typing import Callable, Dict, List, Optional
 import asyncio
 from asyncio import Queue
 
@@ -28,15 +49,101 @@ class App:
     """Main application class."""
     def __init__(self):
         self.process_manager = ProcessManager()
-        self.current_tasks = []
         self._folder_paths = load_state()
+        self.settings = load_settings()
+        self.job_queue = open_job_queue(self.settings['job_queue_path']) if self.settings['job_queue_path'] else None
         self.index_page = None
         self.ui_queue = Queue()
+        self.events = EventBus()
+        # Latest progress per folder for reconnecting pages, snapshotted to disk
+        self.run_state = RunStateStore()
+        self.run_state.load()
+        get_worker_pool().configure(int(self.settings['worker_max_files'] or 0),
+                                    int(float(self.settings['worker_max_memory_mb'] or 0) * 1e6))
+        # Worker slots shared by all jobs, on top of each run's own thread count
+        self.worker_budget = FairShareScheduler(int(self.settings['worker_budget'] or os.cpu_count() or 1),
+                                                max_wait=float(self.settings['priority_max_wait']))
+
+    async def process_folder(self, folder_path: str, progress_ui, thread_count: int, auto_threads: bool = False,
+                             watch: bool = False, priority: Optional[str] = None):
+        """Process a folder of PDF files as a job of its own.
+
+        With auto_threads the worker count is tuned while the run goes on,
+        using thread_count as the upper limit. With watch, new files that
+        arrive in the folder are processed until the job is stopped.
+        priority overrides the folder's configured priority class.
+        Refused while another job is processing the same folder.
+        """
+        if self.process_manager.is_processing(folder_path):
+            msg = f"{os.path.basename(folder_path)} is already being processed"
+            if progress_ui is not None:
+                progress_ui.update({'message': msg, 'type': 'warning'})
+            return False, msg
+
+        job = self.process_manager.create_job([folder_path], {
+            'thread_count': int(thread_count), 'auto_threads': auto_threads, 'watch': watch, 'priority': priority
+        })
+        await self.run_job(job, progress_ui)
+        return job.results[job.folders[0]]['success'], job.results[job.folders[0]]['message']
+
+    def submit_job(self, folders: List[str], options: Optional[Dict] = None) -> Job:
+        """Start a job in the background, e.g. on behalf of an API client."""
+        job = self.process_manager.create_job(folders, options)
+        job.task = asyncio.create_task(self.run_job(job))
+        logger.info(f"Submitted job {job.id} for {len(job.folders)} folders")
+        return job
+
+    async def run_job(self, job: Job, progress_ui=None):
+        """Run a job's folders side by side until they finish or the job is stopped."""
+        job.start(get_worker_pool().stats)
+        self.events.publish({'type': 'job', 'job': job.id, 'state': job.state})
+        thread_count = int(job.options.get('thread_count', 4))
+        auto_threads = bool(job.options.get('auto_threads', False))
+        watch = bool(job.options.get('watch', False))
+        try:
+            # Every folder runs to its end even when another fails, so none is left unobserved
+            results = await asyncio.gather(*(
+                self._run_folder(job, folder, progress_ui, thread_count, auto_threads, watch)
+                for folder in job.folders
+            ), return_exceptions=True)
+            failed = False
+            for folder, result in zip(job.folders, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Job {job.id} failed on {folder}: {type(result).__name__}: {result}")
+                    job.results[folder] = {'success': False, 'message': str(result) or type(result).__name__}
+                    failed = True
+                else:
+                    success, message = result
+                    job.results[folder] = {'success': success, 'message': message}
+            if failed:
+                job.finish(FAILED)
+            else:
+                job.finish(CANCELLED if job.cancel_requested else COMPLETED)
+        except asyncio.CancelledError:
+            job.finish(CANCELLED)
+            raise
+        finally:
+            if not job.is_finished:
+                job.finish(CANCELLED)
+            self.events.publish({'type': 'job', 'job': job.id, 'state': job.state})
+            logger.info(f"Job {job.id} {job.state}")
+
+    async def _run_folder(self, job: Job, folder_path: str, progress_ui, thread_count: int,
+                          auto_threads: bool = False, watch: bool = False):
+        """Process one folder of a job.
+
+        With a shared job queue configured, the folder is published to the
+        queue and processed together with the other nodes. Progress is
+        also published on the event bus, tagged with the folder and job.
+        """
+        progress_ui = ProgressPublisher(self.events, folder_path, progress_ui, job.id)
+        if self.job_queue is not None:
+            return await self._process_folder_shared(job, folder_path, progress_ui, thread_count, watch)
 
-    async def process_folder(self, folder_path: str, progress_ui, thread_count: int):
-        """Process a folder of PDF files."""
         progress_manager = ProgressManager()
-        file_tracker = FileTracker(folder_path)
+        job.progress[folder_path] = progress_manager
+        file_tracker = await run.io_bound(FileTracker, folder_path)
+        matcher = FileMatcher.from_settings(self.settings)
 
         success, prep_message = await FileScanner.prepare_folders(folder_path)
         if not success:
@@ -45,16 +152,32 @@ class App:
             await asyncio.sleep(0)  # Yield to the event loop
             return False, prep_message
 
-        await FileScanner.cleanup_temp_files(folder_path)
+        # Resume an interrupted run from its journal instead of rescanning
+        journal = RunJournal(folder_path)
+        try:
+            pending = await run.io_bound(journal.recover)
+        except Exception as e:
+            logger.error(f"Could not read run journal for {folder_path}: {e}")
+            pending = None
 
-        file_list, scan_messages = await FileScanner.scan_pdfs(folder_path, file_tracker)
-        for msg in scan_messages:
+        file_list = [f for f in pending if not file_tracker.is_processed(f)] if pending else []
+        if file_list:
+            msg = f"Resuming interrupted run: {len(file_list)} files remaining"
             progress_manager.add_message(msg)
             progress_ui.update({'message': msg, 'type': 'info'})
-            await asyncio.sleep(0)  # Yield to the event loop
+        else:
+            if pending is None:
+                # No journal from a previous run, so temp files can be anywhere
+                await FileScanner.cleanup_temp_files(folder_path)
+
+            file_list, scan_messages = await FileScanner.scan_pdfs(folder_path, file_tracker, matcher)
+            for msg in scan_messages:
+                progress_manager.add_message(msg)
+                progress_ui.update({'message': msg, 'type': 'info'})
+                await asyncio.sleep(0)  # Yield to the event loop
 
         total_files = len(file_list)
-        if not total_files:
+        if not total_files and not watch:
             msg = "No new PDF files found to process."
             progress_manager.add_message(msg, "warning")
             progress_ui.update({'message': msg, 'type': 'warning'})
@@ -62,6 +185,7 @@ class App:
             return True, msg
 
         progress_manager.start_batch(total_files)
+        await run.io_bound(journal.begin, file_list)
         progress_ui.update({
             'progress': 0,
             'text': f"Starting to process {total_files} files",
@@ -69,90 +193,543 @@ class App:
         })
         await asyncio.sleep(0)  # Yield to the event loop
         
-        self.process_manager.start_processing(folder_path)
+        sink = await run.io_bound(create_sink, self.settings, folder_path)
 
-        # Use asyncio.Semaphore for throttling
-        semaphore = asyncio.Semaphore(thread_count)
+        # Throttle with a limiter the auto controller can resize mid-run
+        thread_count = int(thread_count)
+        controller = None
+        controller_task = None
+        if auto_threads:
+            limiter = AdaptiveLimiter(default_worker_count(thread_count))
+            controller = ConcurrencyController(limiter, min_workers=1, max_workers=thread_count,
+                                               name=os.path.basename(folder_path))
+            controller_task = asyncio.create_task(controller.run())
+            logger.info(f"Auto concurrency enabled for {folder_path}: "
+                        f"starting with {limiter.limit} workers (max {thread_count})")
+        else:
+            limiter = AdaptiveLimiter(thread_count)
+        slots = self._folder_slots(job, folder_path, limiter)
+        prefetcher = self._prefetcher(folder_path, thread_count)
+        if prefetcher:
+            prefetcher.extend(file_list)
+            prefetcher.start()
         
         async def process_file(file_path: str):
-            async with semaphore:
-                await self._process_file_with_retry(file_path, progress_ui, file_tracker, progress_manager)
+            try:
+                if matcher.matches_archive(os.path.basename(file_path)):
+                    await self._process_archive(job, file_path, folder_path, matcher, slots, progress_ui,
+                                                file_tracker, progress_manager, journal, sink)
+                else:
+                    await self._process_file_with_retry(job, file_path, folder_path, slots, progress_ui,
+                                                        file_tracker, progress_manager, journal, sink)
+            finally:
+                if prefetcher:
+                    prefetcher.done(file_path)
+            if controller:
+                controller.record_completion()
+
+        # Work queue fed by the scan and, in watch mode, by the folder watcher.
+        # None marks the end of the queue.
+        queue: asyncio.Queue = asyncio.Queue()
+        queued = set(file_list)
+        for file_path in file_list:
+            queue.put_nowait(file_path)
 
-        # Create tasks for all files
-        tasks = [process_file(file_path) for file_path in file_list]
+        async def dispatch():
+            tasks = set()
+            try:
+                while True:
+                    file_path = await queue.get()
+                    if file_path is None:
+                        break
+                    task = asyncio.create_task(process_file(file_path))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        async def enqueue_new_file(file_path: str):
+            if file_path in queued or file_tracker.is_processed(file_path):
+                return
+            queued.add(file_path)
+            journal.enqueue([file_path])
+            progress_manager.total_files += 1
+            if prefetcher:
+                prefetcher.extend([file_path])
+            queue.put_nowait(file_path)
+            logger.info(f"Queued new file {file_path}")
+
+        watcher_task = None
+        if watch:
+            watcher = FolderWatcher(
+                folder_path,
+                on_file=enqueue_new_file,
+                matcher=matcher,
+                force_polling=self.settings['watch_force_polling']
+            )
+            watcher_task = asyncio.create_task(watcher.run())
+            msg = f"Watching {os.path.basename(folder_path)} for new files"
+            progress_manager.add_message(msg)
+            progress_ui.update({'message': msg, 'type': 'info'})
 
         # Process files concurrently with proper cancellation handling
+        dispatch_task = asyncio.create_task(dispatch())
         try:
-            await asyncio.gather(*tasks)
+            if watcher_task:
+                # Keep feeding the queue until the job is stopped
+                while job.is_processing():
+                    await asyncio.sleep(1)
+                watcher_task.cancel()
+            queue.put_nowait(None)
+            await dispatch_task
             logger.info(f"All tasks completed for {folder_path}")
+            if job.is_processing() or watch:
+                await run.io_bound(journal.finish)
         except asyncio.CancelledError:
             logger.info(f"Processing cancelled for {folder_path}")
+            dispatch_task.cancel()
             raise
         finally:
-            self.process_manager.reset()
-            logger.info(f"Processing reset for {folder_path}")
+            await run.io_bound(journal.close)
+            await run.io_bound(sink.close)
+            await run.io_bound(file_tracker.close)
+            await self._prune_result_cache()
+            if watcher_task:
+                watcher_task.cancel()
+            if controller_task:
+                controller_task.cancel()
+            if prefetcher:
+                prefetcher.stop()
+            self.worker_budget.forget(f"{job.id}:{folder_path}")
+            workers = job.worker_stats()
+            logger.info(f"Processing finished for {folder_path}; event loop lag {loop_monitor.format()}; "
+                        f"{workers.get('timeouts', 0)} worker timeouts, {workers.get('recycled_files', 0)} "
+                        f"workers recycled by file count and {workers.get('recycled_memory', 0)} by memory")
 
-        if not self.process_manager.is_processing():
+        if job.cancel_requested and not watch:
             return False, "Processing stopped by user"
         
-        final_msg = f"Successfully processed {progress_manager.processed_files} out of {total_files} files"
+        final_msg = (f"Successfully processed {progress_manager.processed_files} out of {progress_manager.total_files} files "
+                     f"({progress_manager.bytes_read / 1e6:.1f} MB read, "
+                     f"{progress_manager.bytes_written / 1e6:.1f} MB written"
+                     + (f", {progress_manager.cache_hits} from the result cache)" if progress_manager.cache_hits else ")"))
         progress_ui.update({'message': final_msg, 'type': 'success'})
         await asyncio.sleep(0)  # Yield to the event loop
         return progress_manager.processed_files > 0, final_msg
 
-    async def _process_file_with_retry(self, file_path: str, progress_ui, file_tracker, progress_manager):
-        """Process a single file with retry logic."""
-        max_retries = 3
-        retry_delay = 5  # seconds
+    async def _process_folder_shared(self, job: Job, folder_path: str, progress_ui, thread_count: int,
+                                     watch: bool = False):
+        """Publish a folder to the shared job queue and work on it alongside the other nodes.
 
-        for attempt in range(1, max_retries + 1):
-            try:
-                # Changed to use sync version with run.cpu_bound
-                success, message = await run.cpu_bound(
-                    process_pdf_sync,
-                    file_path,
-                    self.process_manager.is_processing()
+        The queue, not this instance, decides which node processes a file;
+        the run ends when every file of the folder has a final status.
+        """
+        progress_manager = ProgressManager()
+        job.progress[folder_path] = progress_manager
+        # Only read, to leave out files finished by earlier local runs; the queue records this run
+        file_tracker = await run.io_bound(FileTracker, folder_path)
+        matcher = FileMatcher.from_settings(self.settings)
+
+        success, prep_message = await FileScanner.prepare_folders(folder_path)
+        if not success:
+            progress_manager.add_message(prep_message, "error")
+            progress_ui.update({'message': prep_message, 'type': 'error'})
+            return False, prep_message
+
+        file_list, scan_messages = await FileScanner.scan_pdfs(folder_path, file_tracker, matcher)
+        for msg in scan_messages:
+            progress_manager.add_message(msg)
+            progress_ui.update({'message': msg, 'type': 'info'})
+            await asyncio.sleep(0)  # Yield to the event loop
+
+        published = await run.io_bound(self.job_queue.publish, folder_path, file_list)
+        counts = await run.io_bound(self.job_queue.counts, folder_path)
+        remaining = counts.get('queued', 0) + counts.get('leased', 0)
+        msg = f"Published {published} new files to the shared queue, {remaining} waiting to be processed"
+        progress_manager.add_message(msg)
+        progress_ui.update({'message': msg, 'type': 'info'})
+        if not remaining and not watch:
+            msg = "No new PDF files found to process."
+            progress_ui.update({'message': msg, 'type': 'warning'})
+            return True, msg
+
+        progress_manager.start_batch(remaining)
+        sink = await run.io_bound(create_sink, self.settings, folder_path)
+        journal = LeaseJournal(self.job_queue)
+        worker = QueueWorker(
+            journal,
+            self._queue_item_processor(job, folder_path, matcher,
+                                       self._folder_slots(job, folder_path, AdaptiveLimiter(int(thread_count))),
+                                       progress_ui, progress_manager, journal, sink),
+            concurrency=int(thread_count),
+            lease_seconds=float(self.settings['lease_seconds']),
+            max_claims=int(self.settings['max_attempts']),
+            folder=folder_path
+        )
+
+        async def publish_new_file(file_path: str):
+            if not file_tracker.is_processed(file_path) and \
+                    await run.io_bound(self.job_queue.publish, folder_path, [file_path]):
+                progress_manager.total_files += 1
+                logger.info(f"Published new file {file_path}")
+
+        watcher_task = None
+        if watch:
+            watcher = FolderWatcher(folder_path, on_file=publish_new_file, matcher=matcher,
+                                    force_polling=self.settings['watch_force_polling'])
+            watcher_task = asyncio.create_task(watcher.run())
+
+        try:
+            await worker.run(lambda: not job.is_processing(), drain=not watch)
+        finally:
+            await run.io_bound(sink.close)
+            await run.io_bound(file_tracker.close)
+            await self._prune_result_cache()
+            if watcher_task:
+                watcher_task.cancel()
+            self.worker_budget.forget(f"{job.id}:{folder_path}")
+            logger.info(f"Processing finished for {folder_path}")
+
+        counts = await run.io_bound(self.job_queue.counts, folder_path)
+        final_msg = (f"Processed {progress_manager.processed_files} files on this node; "
+                     f"{counts.get('purged', 0)} purged in total across nodes")
+        progress_ui.update({'message': final_msg, 'type': 'success'})
+        return progress_manager.processed_files > 0, final_msg
+
+    def _profile_options(self, folder_path: str) -> Optional[Dict]:
+        """FileProfiler options for a folder's files, None when profiling is off."""
+        threshold = float(self.settings['profile_threshold'] or 0)
+        sample_rate = float(self.settings['profile_sample_rate'] or 0)
+        if threshold <= 0 and sample_rate <= 0:
+            return None
+        return {'dir': os.path.join(folder_path, 'logs', 'profiles'), 'threshold': threshold,
+                'sample_rate': sample_rate}
+
+    def _cache_options(self) -> Optional[Dict]:
+        """ResultCache options for process_pdf, None when the cache is off."""
+        if not self.settings['result_cache_dir']:
+            return None
+        return {'dir': self.settings['result_cache_dir'], 'link': bool(self.settings['result_cache_link'])}
+
+    async def _prune_result_cache(self):
+        """Keep the result cache within its configured size."""
+        if not self.settings['result_cache_dir']:
+            return
+        try:
+            await run.io_bound(ResultCache(self.settings['result_cache_dir']).prune,
+                               int(float(self.settings['result_cache_mb']) * 1e6))
+        except Exception as e:
+            logger.warning(f"Could not prune the result cache: {e}")
+
+    def _time_budget(self, size: int) -> Optional[float]:
+        """Seconds a document of size bytes may take to purge; None for no limit."""
+        base = float(self.settings['file_timeout'] or 0)
+        if base <= 0:
+            return None
+        return base + float(self.settings['file_timeout_per_mb'] or 0) * size / 1e6
+
+    async def _file_size(self, file_path: str) -> int:
+        try:
+            return await run.io_bound(os.path.getsize, file_path)
+        except OSError:
+            return 0  # Let the worker report the error
+
+    def _file_progress(self, size: int, progress_ui) -> Optional[Callable[[Dict], None]]:
+        """Callback passing a large file's stage events (opened, scanned, page, saved) to progress_ui.
+
+        Streaming costs a round trip per page, so smaller files, which
+        finish quickly, are only reported when done.
+        """
+        threshold = float(self.settings['progress_events_mb'] or 0) * 1e6
+        if threshold <= 0 or size < threshold:
+            return None
+        return lambda event: progress_ui.update({'type': 'file_progress', **event})
+
+    def _prefetcher(self, folder_path: str, thread_count: int) -> Optional[ReadAheadPrefetcher]:
+        """Read-ahead for a folder's files, None when it is off for this folder.
+
+        The window also covers the files in flight, so it is widened by
+        the run's thread count to stay ahead of them.
+        """
+        depth = self.settings['prefetch_files']
+        if depth is None:
+            depth = 8 if is_network_mount(folder_path) else 0
+        if int(depth) <= 0:
+            return None
+        logger.info(f"Reading up to {depth} files ahead in {folder_path}")
+        return ReadAheadPrefetcher(int(depth) + thread_count, int(float(self.settings['prefetch_mb']) * 1e6))
+
+    def _folder_slots(self, job: Job, folder_path: str, limiter) -> NestedLimiter:
+        """Limit a folder run by its own limiter and by its fair share of the worker budget."""
+        priority = resolve_priority(job.options, self.settings, folder_path)
+        return NestedLimiter(limiter, self.worker_budget.slots(f"{job.id}:{folder_path}", priority))
+
+    def _queue_item_processor(self, job: Job, folder_path: str, matcher, limiter, progress_ui,
+                              progress_manager, journal, sink):
+        """Build the QueueWorker callback that processes one claimed file of a folder.
+
+        Outcomes go to the queue only, never to the folder's tracking files.
+        """
+        outcomes = QueueOutcomes()
+
+        async def process_item(item):
+            if matcher.matches_archive(os.path.basename(item.path)):
+                await self._process_archive(job, item.path, folder_path, matcher, limiter, progress_ui,
+                                            outcomes, progress_manager, journal, sink)
+            else:
+                await self._process_file_with_retry(job, item.path, folder_path, limiter, progress_ui,
+                                                    outcomes, progress_manager, journal, sink)
+            outcome = outcomes.take(item.path)
+            if outcome is not None and outcome[0] == "skipped" and not job.is_processing():
+                return None  # Stopped before it was finished; leave the file to another node
+            return outcome
+        return process_item
+
+    async def serve_queue(self, thread_count: int):
+        """Worker node: process files published to the shared queue by any coordinator."""
+        job = self.process_manager.create_job([], {'role': 'worker', 'thread_count': thread_count})
+        limiter = AdaptiveLimiter(thread_count)
+        progress_ui = LogProgress()
+        journal = LeaseJournal(self.job_queue)
+        processors = {}
+        sinks = []
+
+        async def process_item(item):
+            if item.folder not in processors:
+                await FileScanner.prepare_folders(item.folder)
+                sink = await run.io_bound(create_sink, self.settings, item.folder)
+                sinks.append(sink)
+                job.progress[item.folder] = ProgressManager()
+                processors[item.folder] = self._queue_item_processor(
+                    job, item.folder, FileMatcher.from_settings(self.settings),
+                    self._folder_slots(job, item.folder, limiter), progress_ui,
+                    job.progress[item.folder], journal, sink
                 )
-                
-                # Handle the result
-                if success:
-                    file_tracker.mark_purged(file_path)
-                    progress_manager.processed_files += 1
-                    progress_ui.update({
-                        'message': message,
-                        'type': 'success'
-                    })
-                else:
-                    file_tracker.mark_skipped(file_path)
-                    if "stopped by user" not in message:
-                        progress_ui.update({
-                            'message': message,
-                            'type': 'error'
-                        })
-
-                # Update progress after each file
-                progress = progress_manager.processed_files / progress_manager.total_files
+            return await processors[item.folder](item)
+
+        worker = QueueWorker(
+            journal,
+            process_item,
+            concurrency=thread_count,
+            lease_seconds=float(self.settings['lease_seconds']),
+            max_claims=int(self.settings['max_attempts'])
+        )
+        job.start(get_worker_pool().stats)
+        logger.info(f"Worker {journal.worker_id} serving shared queue with {thread_count} workers (job {job.id})")
+        try:
+            await worker.run(lambda: not job.is_processing())
+        finally:
+            for sink in sinks:
+                await run.io_bound(sink.close)
+            job.finish(CANCELLED if job.cancel_requested else COMPLETED)
+
+    async def _process_file_with_retry(self, job: Job, file_path: str, folder_path: str, limiter, progress_ui,
+                                       file_tracker, progress_manager, journal, sink):
+        """Process a single file, retrying transient failures with backoff.
+
+        A worker slot is only held while an attempt runs, never while waiting
+        to retry. Permanent failures are recorded with their reason and, when
+        enabled, moved into the folder's to_delete subfolder.
+        """
+        max_attempts = int(self.settings['max_attempts'])
+        file_name = os.path.basename(file_path)
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with limiter:
+                    size = await self._file_size(file_path)
+                    output_path = sink.target_path(file_path)
+                    temp_file = f"{output_path or file_path}{uuid.uuid4()}.temp"
+                    journal.started(file_path, temp_file)
+                    success, message, stats = await process_pdf(
+                        file_path,
+                        progress_callback=self._file_progress(size, progress_ui),
+                        process_manager=job,
+                        temp_file=temp_file,
+                        output_path=output_path,
+                        profile=self._profile_options(folder_path),
+                        white_threshold=float(self.settings['white_threshold']),
+                        timeout=self._time_budget(size),
+                        cache=self._cache_options()
+                    )
+                    if success and sink.receives_data:
+                        stats['bytes_written'] = await run.io_bound(sink.accept, file_path, stats.pop('output'))
+            except Exception as e:
+                kind = classify_exception(e)
+                logger.error(f"Attempt {attempt} failed for {file_path} ({kind}): {e}")
+                if kind == TRANSIENT and attempt < max_attempts:
+                    delay = backoff_delay(attempt)
+                    logger.info(f"Retrying {file_name} in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
+                    continue
+                reason = f"{type(e).__name__}: {e}"
+                if isinstance(e, FileTimeout):
+                    # The killed worker may have left its temp file behind
+                    await run.io_bound(remove_temp, temp_file)
+                    reason = f"timed out: {e}"
+                elif kind == TRANSIENT:
+                    reason = f"gave up after {attempt} attempts, {reason}"
+                await self._record_failure(file_path, folder_path, reason, progress_ui, file_tracker)
+                break
+
+            # Handle the result
+            progress_manager.record_io(stats['bytes_read'], stats['bytes_written'])
+            logger.info(f"{file_name}: read {stats['bytes_read']} bytes, wrote {stats['bytes_written']} bytes")
+            if success:
+                await file_tracker.mark_purged(file_path)
+                progress_manager.processed_files += 1
+                if stats.get('cache_hit'):
+                    progress_manager.cache_hits += 1
                 progress_ui.update({
-                    'progress': progress,
-                    'text': f"Processed {progress_manager.processed_files}/{progress_manager.total_files} files",
-                    'type': 'progress'
+                    'message': message,
+                    'type': 'success'
                 })
-                await asyncio.sleep(0)  # Yield after each file
-                return
+            elif "stopped by user" in message:
+                await file_tracker.mark_skipped(file_path)
+            else:
+                # The document itself is unusable, retrying will not help
+                await self._record_failure(file_path, folder_path, message, progress_ui, file_tracker)
+            break
 
-            except Exception as e:
-                logger.error(f"Attempt {attempt} failed for {file_path}: {e}")
-                if attempt < max_retries:
-                    logger.info(f"Retrying in {retry_delay} seconds...")
-                    await asyncio.sleep(retry_delay)
-                else:
-                    logger.error(f"Max retries reached for {file_path}. Skipping.")
-                    progress_ui.update({
-                        'message': f"Failed to process {os.path.basename(file_path)} after multiple retries.",
-                        'type': 'error'
-                    })
-                    file_tracker.mark_skipped(file_path)
-                    await asyncio.sleep(0)  # Yield after failure
+        journal.done(file_path)
+        await self._update_file_progress(progress_ui, progress_manager)
+
+    async def _process_archive(self, job: Job, archive_path: str, folder_path: str, matcher, limiter, progress_ui,
+                               file_tracker, progress_manager, journal, sink):
+        """Purge the matching PDFs inside a ZIP archive into name.purged.zip.
+
+        Members are read from the archive and sent to the purge workers as
+        bytes, so nothing is extracted to disk. Members whose document is
+        unusable, and all non-matching members, are copied to the new
+        archive unchanged. Transient errors are retried like whole files;
+        if they persist, or the job is stopped, no archive is written.
+        The new archive goes where the sink puts files: next to the source,
+        into the mirror tree, or, built in the logs folder, into the
+        output archive.
+        """
+        archive_name = os.path.basename(archive_path)
+        purged_name = os.path.basename(purged_archive_path(archive_path))
+        target = sink.target_path(archive_path)
+        if target is not None:
+            output_path = purged_archive_path(target)
+        else:
+            output_path = os.path.join(folder_path, "logs", f"{uuid.uuid4()}{PURGED_ARCHIVE_SUFFIX}")
+        temp_file = f"{output_path}{uuid.uuid4()}.temp"
+        journal.started(archive_path, temp_file)
+
+        try:
+            rewriter = await run.io_bound(ArchiveRewriter, archive_path, output_path, temp_file)
+        except Exception as e:
+            await self._record_failure(archive_path, folder_path, f"Cannot read archive: {e}", progress_ui, file_tracker)
+            journal.done(archive_path)
+            await self._update_file_progress(progress_ui, progress_manager)
+            return
+
+        members = rewriter.members(matcher.matches_member)
+        purged = []
+        failed = []
+
+        max_attempts = int(self.settings['max_attempts'])
+
+        async def purge_member(name: str):
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    async with limiter:
+                        data = await run.io_bound(rewriter.read, name)
+                        progress_manager.record_io(len(data), 0)
+                        success, message, output, _ = await get_worker_pool().submit(
+                            purge_pdf_bytes, data, f"{archive_name}/{name}", job.is_processing(), None,
+                            float(self.settings['white_threshold']), timeout=self._time_budget(len(data))
+                        )
+                    break
+                except Exception as e:
+                    kind = classify_exception(e)
+                    logger.error(f"Attempt {attempt} failed for {name} in {archive_name} ({kind}): {e}")
+                    if kind == TRANSIENT and attempt < max_attempts:
+                        delay = backoff_delay(attempt)
+                        logger.info(f"Retrying {name} in {archive_name} in {delay:.1f} seconds...")
+                        await asyncio.sleep(delay)
+                        continue
+                    if kind == TRANSIENT:
+                        raise  # Never write the member unpurged because of a flaky share or worker
+                    success, message = False, f"{type(e).__name__}: {e}"
+                    break
+            if success:
+                progress_manager.record_io(0, await run.io_bound(rewriter.write, name, output))
+                purged.append(name)
+            else:
+                failed.append(name)
+                logger.warning(f"Keeping {name} in {archive_name} unchanged: {message}")
+
+        stopped = False
+        try:
+            if members:
+                results = await asyncio.gather(*(purge_member(name) for name in members), return_exceptions=True)
+                errors = [r for r in results if isinstance(r, BaseException)]
+                if errors:
+                    raise errors[0]
+                stopped = not job.is_processing()
+            if members and not stopped:
+                await run.io_bound(rewriter.commit)
+                if sink.receives_data:
+                    journal.started(archive_path, output_path)  # Cleaned up after a crash from here on
+                    try:
+                        await run.io_bound(sink.accept_file, purged_archive_path(archive_path), output_path)
+                    finally:
+                        await run.io_bound(remove_temp, output_path)
+            else:
+                await run.io_bound(rewriter.abort)
+        except asyncio.CancelledError:
+            await run.io_bound(rewriter.abort)
+            raise
+        except Exception as e:
+            await run.io_bound(rewriter.abort)
+            await self._record_failure(archive_path, folder_path, f"Cannot purge {archive_name}: {type(e).__name__}: {e}",
+                                       progress_ui, file_tracker)
+        else:
+            if stopped:
+                # Members cut short by the stop would be baked in unpurged
+                await file_tracker.mark_skipped(archive_path)
+                logger.info(f"Stopped before {archive_name} was finished; no archive written")
+            elif members:
+                await file_tracker.mark_purged(archive_path)
+                progress_manager.processed_files += 1
+                message = f"Purged {len(purged)} of {len(members)} PDFs in {archive_name} into {purged_name}"
+                if failed:
+                    message += f" ({len(failed)} kept unchanged)"
+                progress_ui.update({'message': message, 'type': 'warning' if failed else 'success'})
+            else:
+                await file_tracker.mark_skipped(archive_path)
+                logger.info(f"No matching PDFs in {archive_name}")
+
+        journal.done(archive_path)
+        await self._update_file_progress(progress_ui, progress_manager)
+
+    async def _update_file_progress(self, progress_ui, progress_manager):
+        """Update progress after each file."""
+        progress = progress_manager.processed_files / max(progress_manager.total_files, 1)
+        progress_ui.update({
+            'progress': progress,
+            'text': f"Processed {progress_manager.processed_files}/{progress_manager.total_files} files",
+            'type': 'progress'
+        })
+        await asyncio.sleep(0)  # Yield after each file
+
+    async def _record_failure(self, file_path: str, folder_path: str, reason: str, progress_ui, file_tracker):
+        """Record a permanent failure and optionally quarantine the file."""
+        await file_tracker.mark_failed(file_path, reason)
+        message = f"Failed to process {os.path.basename(file_path)}: {reason}"
+        if self.settings['quarantine_failures']:
+            target = await FileScanner.quarantine_file(folder_path, file_path)
+            if target:
+                message += " (moved to to_delete)"
+        logger.error(message)
+        progress_ui.update({
+            'message': message,
+            'type': 'error'
+        })
 
     async def process_ui_queue(self):
         """Process UI update messages from the queue."""
@@ -178,8 +755,16 @@ async def initialize_app():
 
         logger.info("Application initialized successfully")
         
+        register_job_api(app_instance)
+        app_instance.run_state.start(app_instance.events)
+        app.on_shutdown(app_instance.run_state.stop)
+        app.on_shutdown(get_worker_pool().shutdown)
+        app.on_shutdown(shutdown_event_manager)
+
         # Create the task here, after the event loop is running
         asyncio.create_task(app_instance.process_ui_queue())
+        if app_instance.job_queue is not None and app_instance.settings['node_role'] == 'worker':
+            asyncio.create_task(app_instance.serve_queue(default_worker_count(os.cpu_count() or 1)))
         
         @ui.page('/process/{folder_path}')
         async def process_page_route(folder_path: str):
@@ -193,8 +778,12 @@ async def initialize_app():
 if __name__ in {"__main__", "__mp_main__"}:
     def startup():
         loop = asyncio.get_running_loop()
-        loop.set_debug(True)
-        loop.slow_callback_duration = 0.05
+        # Debug mode slows every callback down; only for diagnosing the loop
+        if load_settings()['asyncio_debug'] or os.environ.get('PDF_PURGER_ASYNCIO_DEBUG') == '1':
+            loop.set_debug(True)
+            loop.slow_callback_duration = 0.05
+            logger.warning("asyncio debug mode enabled")
+        loop_monitor.start()
 
     app.on_startup(startup)
     app.on_startup(initialize_app)
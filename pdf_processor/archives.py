@@ -0,0 +1,86 @@
+import os
+import logging
+import zipfile
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger("pdf_purger")
+
+# Suffix of archives written by the purger, never scanned as input
+PURGED_ARCHIVE_SUFFIX = ".purged.zip"
+
+def purged_archive_path(archive_path: str) -> str:
+    """Output path for an archive: name.zip -> name.purged.zip."""
+    root, _ = os.path.splitext(archive_path)
+    return root + PURGED_ARCHIVE_SUFFIX
+
+class ArchiveRewriter:
+    """Read members from a ZIP archive and write a rewritten copy of it.
+
+    Members are streamed from the source archive as bytes and written to a
+    temp archive, which replaces output_path on commit. Reads and writes
+    are serialised, so it can be shared by concurrent tasks.
+    """
+    def __init__(self, source_path: str, output_path: str, temp_path: str):
+        self.source_path = source_path
+        self.output_path = output_path
+        self.temp_path = temp_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(temp_path) or ".", exist_ok=True)
+        self._source = zipfile.ZipFile(source_path, 'r')
+        self._output = zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+        self._written = set()
+
+    def members(self, is_target: Callable[[str], bool]) -> List[str]:
+        """Names of file members accepted by is_target."""
+        return [info.filename for info in self._source.infolist()
+                if not info.is_dir() and is_target(info.filename)]
+
+    def read(self, name: str) -> bytes:
+        with self._lock:
+            return self._source.read(name)
+
+    def write(self, name: str, data: bytes) -> int:
+        """Store data for a member, keeping its original timestamp."""
+        info = self._source.getinfo(name)
+        out_info = zipfile.ZipInfo(name, date_time=info.date_time)
+        # PDFs are already compressed; keep non-PDF members as they were
+        out_info.compress_type = zipfile.ZIP_STORED if name.lower().endswith('.pdf') else info.compress_type
+        out_info.external_attr = info.external_attr
+        with self._lock:
+            self._output.writestr(out_info, data)
+            self._written.add(name)
+        return len(data)
+
+    def copy_remaining(self):
+        """Copy every member not written yet, so the new archive is complete."""
+        for info in self._source.infolist():
+            if info.filename in self._written:
+                continue
+            with self._lock:
+                if info.is_dir():
+                    self._output.writestr(info, b"")
+                else:
+                    with self._source.open(info) as src, self._output.open(info, 'w') as dst:
+                        while chunk := src.read(1 << 20):
+                            dst.write(chunk)
+                self._written.add(info.filename)
+
+    def commit(self):
+        """Finish the new archive and move it into place."""
+        self.copy_remaining()
+        self._source.close()
+        self._output.close()
+        os.replace(self.temp_path, self.output_path)
+
+    def abort(self):
+        """Discard the partial output."""
+        for archive in (self._source, self._output):
+            try:
+                archive.close()
+            except Exception:
+                pass
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
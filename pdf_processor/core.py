@@ -1,121 +1,88 @@
-import fitz
 import os
-import uuid
 import logging
 import asyncio
-from typing import Tuple
-from nicegui import app
-from pdf_processor.utils import repair_xrefs, replace_white_with_black
+import threading
+import multiprocessing
+from typing import Callable, Dict, Optional, Tuple
+from pdf_processor.processor import process_pdf_sync
+from pdf_processor.utils import WHITE_THRESHOLD
+from pdf_processor.worker_pool import WorkerPool
 
 logger = logging.getLogger("pdf_purger")
 
-async def process_pdf(filepath: str, progress_callback, process_manager) -> Tuple[bool, str]:
-    """Process a single PDF file with proper async handling."""
-    file_name = os.path.basename(filepath)
-    temp_file = filepath + str(uuid.uuid4()) + ".temp"
-    doc = None
-    successful = False
+_event_manager = None
+_event_manager_lock = threading.Lock()
+_worker_pool = None
 
-    try:
-        logger.info(f"Starting processing of {file_name}")
-        # Run PDF operations in a thread pool to avoid blocking
-        loop = asyncio.get_running_loop()
-        
-        # Check if processing should stop
-        if not process_manager.is_processing():
-            return False, "Processing stopped by user"
-        
-        # Initial open and repair if needed
-        try:
-            doc = await loop.run_in_executor(None, fitz.open, filepath)
-            logger.info(f"Successfully opened {file_name}")
-        except Exception as e:
-            if not process_manager.is_processing():
-                return False, "Processing stopped by user"
-                
-            logger.warning(f"Error opening {file_name}: {e}, attempting repair")
-            doc = await loop.run_in_executor(None, fitz.open, filepath)
-            await loop.run_in_executor(None, doc.repair)
-            await loop.run_in_executor(None, 
-                lambda: doc.save(temp_file,
-                    garbage=4,
-                    clean=True,
-                    deflate=True,
-                    pretty=False,
-                    linear=True)
-            )
-            await loop.run_in_executor(None, doc.close)
-            
-            # Verify repair
-            doc = await loop.run_in_executor(None, fitz.open, temp_file)
-            os.replace(temp_file, filepath)
-            doc = await loop.run_in_executor(None, fitz.open, filepath)
-            logger.info(f"Successfully repaired and reopened {file_name}")
+def get_worker_pool() -> WorkerPool:
+    """The process pool that runs all purge work, created on first use."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = WorkerPool()
+    return _worker_pool
 
-        if not process_manager.is_processing():
-            return False, "Processing stopped by user"
+def _new_event_queue():
+    """A queue for one file's progress events, starting the manager process on first use.
 
-        if not await loop.run_in_executor(None, repair_xrefs, doc):
-            if progress_callback:
-                progress_callback({
-                    'type': 'warning',
-                    'message': f"Initial xref repair failed for {file_name}"
-                })
-            logger.warning(f"Initial xref repair failed for {file_name}")
+    The manager is spawned like the purge workers, never forked from this
+    threaded process. Blocks, so it runs on the pool's threads.
+    """
+    global _event_manager
+    with _event_manager_lock:
+        if _event_manager is None:
+            _event_manager = multiprocessing.get_context('spawn').Manager()
+        return _event_manager.Queue()
 
-        # Get total pages and empty pages
-        total_pages = len(doc)
-        empty_pages = []
-        
-        # Find empty pages
-        for p_num in range(total_pages):
-            if not process_manager.is_processing():
-                return False, "Processing stopped by user"
-                
-            text = await loop.run_in_executor(None, lambda: doc[p_num].get_text().strip())
-            if not text:
-                empty_pages.append(p_num)
-            await asyncio.sleep(0) # Yield to the event loop after each page check
-        logger.info(f"Found {len(empty_pages)} empty pages in {file_name}")
+def shutdown_event_manager():
+    global _event_manager
+    with _event_manager_lock:
+        if _event_manager is not None:
+            _event_manager.shutdown()
+            _event_manager = None
 
-        # Delete empty pages in reverse order
-        for page_num in reversed(empty_pages):
-            if not process_manager.is_processing():
-                return False, "Processing stopped by user"
-                
-            try:
-                await loop.run_in_executor(None, doc.delete_page, page_num)
-                logger.info(f"Deleted page {page_num + 1} in {file_name}")
-            except Exception as e:
-                logger.warning(f"Error deleting page {page_num + 1} in {file_name}: {e}")
-            await asyncio.sleep(0) # Yield after each page deletion
+async def _pump_events(events, progress_callback: Callable[[Dict], None]):
+    """Forward worker progress events to the callback until the end marker."""
+    while True:
+        event = await get_worker_pool().wait(events.get)
+        if event is None:
+            return
+        try:
+            progress_callback(event)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
 
-        # Process remaining pages
-        for p_num in range(len(doc)):
-            if not process_manager.is_processing():
-                return False, "Processing stopped by user"
+async def process_pdf(filepath: str, progress_callback: Optional[Callable[[Dict], None]] = None,
+                      process_manager=None, temp_file: Optional[str] = None,
+                      output_path: Optional[str] = "", profile: Optional[Dict] = None,
+                      white_threshold: float = WHITE_THRESHOLD,
+                      timeout: Optional[float] = None,
+                      cache: Optional[Dict] = None) -> Tuple[bool, str, Dict]:
+    """Process a single PDF file in one hop to the purge pool.
 
-            page = doc[p_num]
-            
-            # Remove images
-            try:
-                image_list = await loop.run_in_executor(None, page.get_images, True)
-                for img in image_list:
-                    if not process_manager.is_processing():
-                        return False, "Processing stopped by user"
-                    try:
-                        await loop.run_in_executor(None, page.delete_image, img[0])
-                        logger.info(f"Deleted image {img[0]} on page {p_num + 1} in {file_name}")
-                    except Exception as e:
-                        logger.warning(f"Error deleting image {img[0]} on page {p_num + 1} in {file_name}: {e}")
-                    await asyncio.sleep(0) # Yield after each image deletion
-            except Exception as e:
-                logger.warning(f"Error getting images on page {p_num + 1} in {file_name}: {e}")
+    The whole document is opened, purged and saved by process_pdf_sync in a
+    worker process. When progress_callback is given, the worker's stage
+    events are streamed back and passed to it on the event loop. Returns
+    the same result as process_pdf_sync; output_path, profile,
+    white_threshold and cache are passed through. After timeout
+    seconds the worker is killed and FileTimeout raised.
+    """
+    is_processing = process_manager.is_processing() if process_manager else True
+    if not is_processing:
+        return False, "Processing stopped by user", {'bytes_read': 0, 'bytes_written': 0}
 
-            # Fix text colors
-            if not process_manager.is_processing():
-                return False, "Processing stopped by user"
-            await loop.run_in_executor(None, replace_white_with_black, page)
-            await asyncio.sleep(0) # Yield after each page processing
+    if progress_callback is None:
+        return await get_worker_pool().submit(process_pdf_sync, filepath, is_processing, temp_file, None,
+                                              output_path, profile, white_threshold, cache, timeout=timeout)
 
-        # Final
+    events = await get_worker_pool().wait(_new_event_queue)
+    pump = asyncio.create_task(_pump_events(events, progress_callback))
+    try:
+        return await get_worker_pool().submit(process_pdf_sync, filepath, is_processing, temp_file, events,
+                                              output_path, profile, white_threshold, cache, timeout=timeout)
+    finally:
+        # The worker sends its own end marker; this one covers a crashed worker
+        events.put(None)
+        try:
+            await pump
+        except Exception as e:
+            logger.warning(f"Error streaming progress for {os.path.basename(filepath)}: {e}")
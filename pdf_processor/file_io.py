@@ -0,0 +1,45 @@
+import os
+import logging
+
+logger = logging.getLogger("pdf_purger")
+
+def read_file_bytes(filepath: str) -> bytes:
+    """Read a whole file with one open and one sequential read."""
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        remaining = size
+        while True:
+            # A single read normally returns everything; loop for short reads
+            chunk = os.read(fd, max(remaining, 1 << 16))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    finally:
+        os.close(fd)
+
+def atomic_write(filepath: str, data: bytes, temp_file: str):
+    """Write data to temp_file in one sequential write, then rename it over filepath."""
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        os.replace(temp_file, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+
+def remove_temp(temp_file: str):
+    """Remove a temp file left by an interrupted write, if there is one."""
+    try:
+        os.remove(temp_file)
+        logger.info(f"Removed temp file {temp_file}")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete temp file {temp_file}: {e}")
@@ -0,0 +1,110 @@
+import re
+import fitz
+import logging
+from typing import List, Optional, Tuple
+from pdf_processor.utils import WHITE_THRESHOLD
+
+logger = logging.getLogger("pdf_purger")
+
+# Text-showing operators: Tj, TJ, ' and "
+_TEXT_OPERATOR = re.compile(rb"(?<![A-Za-z])(?:Tj|TJ)(?![A-Za-z])|[)\]>]\s*['\"]")
+
+# Text objects, and the literal (one level of nesting) and hex strings shown in them
+_TEXT_OBJECT = re.compile(rb"(?<![A-Za-z])BT(?![A-Za-z])(.*?)(?<![A-Za-z])ET(?![A-Za-z])", re.S)
+_LITERAL_STRING = re.compile(rb"\(((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*)\)", re.S)
+_HEX_STRING = re.compile(rb"(?<!<)<([0-9A-Fa-f\s]*)>(?!>)")
+
+# Escapes for whitespace and NUL in literal strings, and the bytes that show nothing
+_BLANK_ESCAPE = re.compile(rb"\\(?:[nrtfb\r\n]|0?40|0?1[1245]|0{1,3})(?![0-7])")
+_BLANK_BYTES = b" \t\r\n\f\x00"
+
+# Up to four numeric operands followed by a non-stroking color operator
+_FILL_COLOR = re.compile(
+    rb"((?:[-+]?(?:\d+\.?\d*|\.\d+)\s+){1,4})(rg|g|k|scn|sc)(?![A-Za-z])"
+)
+
+
+def fill_luminance(operator: str, values: List[float]) -> Optional[float]:
+    """Approximate luminance (0-1) of a fill color operator, None if unknown."""
+    if operator in ('sc', 'scn'):
+        operator = {1: 'g', 3: 'rg', 4: 'k'}.get(len(values))
+    if operator == 'g' and len(values) >= 1:
+        return values[-1]
+    if operator == 'rg' and len(values) >= 3:
+        r, g, b = values[-3:]
+        return 0.2126 * r + 0.7152 * g + 0.0722 * b
+    if operator == 'k' and len(values) >= 4:
+        c, m, y, k = values[-4:]
+        return (1 - max(c, m, y)) * (1 - k)
+    return None
+
+
+def has_white_fill(content: bytes, threshold: float = WHITE_THRESHOLD) -> bool:
+    """Check a content stream for fill colors at or above the luminance threshold."""
+    for match in _FILL_COLOR.finditer(content):
+        try:
+            values = [float(v) for v in match.group(1).split()]
+        except ValueError:
+            continue
+        luminance = fill_luminance(match.group(2).decode(), values)
+        if luminance is not None and luminance >= threshold:
+            return True
+    return False
+
+
+def _shows_visible_text(content: bytes) -> bool:
+    """Check whether a content stream shows any string that is not just whitespace."""
+    for block in _TEXT_OBJECT.finditer(content):
+        text = block.group(1)
+        if not _TEXT_OPERATOR.search(text):
+            continue
+        for match in _LITERAL_STRING.finditer(text):
+            if _BLANK_ESCAPE.sub(b"", match.group(1)).strip(_BLANK_BYTES):
+                return True
+        for match in _HEX_STRING.finditer(text):
+            digits = b"".join(match.group(1).split())
+            if bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode()).strip(_BLANK_BYTES):
+                return True
+    return False
+
+
+def needs_processing(doc: fitz.Document, white_threshold: float = WHITE_THRESHOLD) -> Tuple[bool, str]:
+    """Cheaply decide whether a document has anything to purge.
+
+    Looks only at the object table and raw content streams, without
+    building text pages. Anything unexpected answers True so the full
+    purge makes the decision.
+
+    A page counts as having text when it shows a string that is not
+    blank, mirroring the purge, which deletes pages whose extracted text
+    is only whitespace. Like the purge's text extraction, invisible text
+    (render mode 3, e.g. an OCR layer) counts as text. Strings are judged
+    by their bytes, without the font's encoding, so a font that maps
+    other codes to blank glyphs can still make a blank page look shown.
+    """
+    try:
+        if getattr(doc, 'is_repaired', False):
+            return True, "document was repaired"
+
+        for xref in range(1, doc.xref_length()):
+            subtype = doc.xref_get_key(xref, "Subtype")
+            if subtype == ('name', '/Image'):
+                return True, "contains images"
+            if subtype == ('name', '/Form') and has_white_fill(doc.xref_stream(xref) or b"", white_threshold):
+                return True, "form XObject uses white fill"
+
+        for page in doc:
+            content_xrefs = page.get_contents()
+            if not content_xrefs:
+                return True, f"page {page.number + 1} has no content stream"
+            content = b"".join(doc.xref_stream(xref) or b"" for xref in content_xrefs)
+            if not _shows_visible_text(content):
+                return True, f"page {page.number + 1} shows no text"
+            if has_white_fill(content, white_threshold):
+                return True, f"page {page.number + 1} uses white fill"
+
+        return False, "no images, empty pages or white fills"
+
+    except Exception as e:
+        logger.warning(f"Pre-filter could not inspect document: {e}")
+        return True, "pre-filter failed"
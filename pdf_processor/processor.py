@@ -1,45 +1,96 @@
-import fitz
 import os
 import uuid
 import logging
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 from pathlib import Path
+from pdf_processor.file_io import read_file_bytes, atomic_write
+from pdf_processor.prefilter import needs_processing
+from pdf_processor.utils import open_document, replace_white_with_black, WHITE_THRESHOLD
+from pdf_processor.profiling import FileProfiler
+from pdf_processor.result_cache import ResultCache, UNCHANGED
 
 logger = logging.getLogger("pdf_purger")
 
-def process_pdf_sync(filepath: str, is_processing: bool) -> Tuple[bool, str]:
-    """Synchronous version of PDF processing."""
-    file_name = os.path.basename(filepath)
-    temp_file = filepath + str(uuid.uuid4()) + ".temp"
-    doc = None
-    successful = False
+def _emit(events, stage: str, file_name: str, **data):
+    """Send a progress event to the parent, if it asked for them."""
+    if events is not None:
+        try:
+            events.put({'stage': stage, 'file': file_name, **data})
+        except Exception as e:
+            logger.debug(f"Could not send progress event for {file_name}: {e}")
+
+def _deliver(filepath: str, output_path: Optional[str], temp_file: str, data: bytes,
+             modified: bool, stats: Dict):
+    """Write the result to its destination, or hand it back when output_path is None."""
+    if output_path is None:
+        stats['output'] = data
+    elif output_path != filepath:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        atomic_write(output_path, data, temp_file)
+        stats['bytes_written'] = len(data)
+    elif modified:
+        atomic_write(filepath, data, temp_file)
+        stats['bytes_written'] = len(data)
+
+def _deliver_cached(result_cache: ResultCache, filepath: str, output_path: Optional[str], temp_file: str,
+                    data: bytes, cached: Tuple[str, str], stats: Dict) -> bool:
+    """Write a result cache entry like _deliver would write the purged bytes; returns whether it is modified."""
+    kind, entry_path = cached
+    if kind == UNCHANGED:
+        _deliver(filepath, output_path, temp_file, data, False, stats)
+        return False
+    if output_path is None:
+        stats['output'] = read_file_bytes(entry_path)
+    else:
+        stats['bytes_written'] = result_cache.deliver(entry_path, output_path, temp_file)
+    return True
+
+def purge_pdf_bytes(data: bytes, file_name: str, is_processing: bool = True, events=None,
+                    white_threshold: float = WHITE_THRESHOLD) -> Tuple[bool, str, Optional[bytes], bool]:
+    """Purge a PDF held in memory.
 
+    Returns success, a message, the resulting bytes (the input itself when
+    nothing changed, None on failure) and whether the document was modified.
+    Text at or above white_threshold luminance is recolored black.
+    Raises OSError like process_pdf_sync.
+    """
+    doc = None
     try:
-        logger.info(f"Starting processing of {file_name}")
-        
-        if not is_processing:
-            return False, "Processing stopped by user"
-        
-        # Initial open
+        # Initial open, repairing in memory if needed
         try:
-            doc = fitz.open(filepath)
-            logger.info(f"Successfully opened {file_name}")
+            doc, repaired = open_document(file_name, data)
+            logger.info(f"Successfully opened {file_name}" + (" (repaired)" if repaired else ""))
+            _emit(events, 'opened', file_name, pages=doc.page_count, repaired=repaired)
+        except OSError:
+            raise
         except Exception as e:
             logger.error(f"Error opening {file_name}: {e}")
-            return False, f"Failed to open file: {str(e)}"
+            return False, f"Failed to open file: {str(e)}", None, False
+
+        if doc.needs_pass:
+            logger.error(f"{file_name} is encrypted")
+            return False, f"File is encrypted: {file_name}", None, False
 
         if not is_processing:
-            return False, "Processing stopped by user"
+            return False, "Processing stopped by user", None, False
+
+        # Skip documents with nothing to purge before building any text pages
+        if not repaired:
+            needed, reason = needs_processing(doc, white_threshold)
+            if not needed:
+                logger.info(f"No modifications needed for {file_name} ({reason})")
+                return True, f"No modifications needed for {file_name}", data, False
+            logger.debug(f"Pre-filter selected {file_name}: {reason}")
 
         # Process the document
-        modified = False
+        modified = repaired  # A repaired document must be written back
         total_pages = len(doc)
         empty_pages = []
         
         # Find empty pages
         for p_num in range(total_pages):
             if not is_processing:
-                return False, "Processing stopped by user"
+                return False, "Processing stopped by user", None, False
                 
             text = doc[p_num].get_text().strip()
             if not text:
@@ -47,11 +98,12 @@ def process_pdf_sync(filepath: str, is_processing: bool) -> Tuple[bool, str]:
                 modified = True
 
         logger.info(f"Found {len(empty_pages)} empty pages in {file_name}")
+        _emit(events, 'scanned', file_name, pages=total_pages, empty_pages=len(empty_pages))
 
         # Delete empty pages in reverse order
         for page_num in reversed(empty_pages):
             if not is_processing:
-                return False, "Processing stopped by user"
+                return False, "Processing stopped by user", None, False
                 
             try:
                 doc.delete_page(page_num)
@@ -64,7 +116,7 @@ def process_pdf_sync(filepath: str, is_processing: bool) -> Tuple[bool, str]:
         remaining_pages = len(doc)
         for p_num in range(remaining_pages):
             if not is_processing:
-                return False, "Processing stopped by user"
+                return False, "Processing stopped by user", None, False
 
             page = doc[p_num]
             page_modified = False
@@ -74,7 +126,7 @@ def process_pdf_sync(filepath: str, is_processing: bool) -> Tuple[bool, str]:
                 image_list = page.get_images(True)
                 for img in image_list:
                     if not is_processing:
-                        return False, "Processing stopped by user"
+                        return False, "Processing stopped by user", None, False
                     try:
                         page.delete_image(img[0])
                         modified = True
@@ -87,107 +139,139 @@ def process_pdf_sync(filepath: str, is_processing: bool) -> Tuple[bool, str]:
 
             # Fix text colors
             if not is_processing:
-                return False, "Processing stopped by user"
+                return False, "Processing stopped by user", None, False
             
-            try:
-                text_blocks = []
-                text_dict = page.get_text("dict")
-                blocks = text_dict.get('blocks', [])
-                for block in blocks:
-                    if block.get("type", -1) == 0:  # Text block
-                        text_blocks.append(block)
-
-                for block in text_blocks:
-                    for line in block.get("lines", []):
-                        for span in line.get("spans", []):
-                            if span["color"] in (0xFFFFFF, 0xFFFFFF00):  # White text
-                                page.insert_text(
-                                    fitz.Rect(span["bbox"]).tl,
-                                    span["text"],
-                                    fontname=span["font"],
-                                    fontsize=span["size"],
-                                    color=0,  # black
-                                    overlay=True
-                                )
-                                modified = True
-                                page_modified = True
-            except Exception as e:
-                logger.warning(f"Error modifying text colors on page {p_num + 1}: {e}")
+            if replace_white_with_black(page, white_threshold):
+                modified = True
+                page_modified = True
 
             if page_modified:
                 logger.info(f"Modified page {p_num + 1} in {file_name}")
+            _emit(events, 'page', file_name, page=p_num + 1, pages=remaining_pages, modified=page_modified)
 
-        # Save the document if modified
-        if modified and is_processing:
-            try:
-                # Try incremental save first
-                doc.save(
-                    temp_file,
-                    garbage=4,
-                    deflate=True,
-                    clean=True,
-                    linear=True,
-                    incremental=True
-                )
-                
-                # Close the current document before replacing
-                doc.close()
-                doc = None
-                
-                # Replace the original file
-                os.replace(temp_file, filepath)
-                successful = True
-                logger.info(f"Successfully processed {file_name}")
-                
-            except Exception as e:
-                logger.warning(f"Incremental save failed for {file_name}, trying regular save: {e}")
-                try:
-                    # If still open, close it
-                    if doc:
-                        doc.close()
-                        doc = None
-                        
-                    # Try regular save
-                    doc = fitz.open(filepath)
-                    doc.save(
-                        temp_file,
-                        garbage=4,
-                        deflate=True,
-                        clean=True,
-                        linear=True,
-                        incremental=False
-                    )
-                    doc.close()
-                    doc = None
-                    
-                    # Replace the original file
-                    os.replace(temp_file, filepath)
-                    successful = True
-                    logger.info(f"Successfully processed {file_name} with regular save")
-                    
-                except Exception as save_e:
-                    logger.error(f"All save attempts failed for {file_name}: {save_e}")
-                    return False, f"Failed to save file: {str(save_e)}"
-        else:
-            successful = True  # If no modifications were needed
+        # Serialise the document if modified
+        if not modified:
             logger.info(f"No modifications needed for {file_name}")
-
-    except Exception as e:
-        logger.error(f"Error processing {file_name}: {e}")
-        return False, f"Error processing {file_name}: {str(e)}"
+            return True, f"No modifications needed for {file_name}", data, False
+        try:
+            output = doc.tobytes(garbage=4, deflate=True, clean=True)
+        except Exception as e:
+            logger.error(f"Save failed for {file_name}: {e}")
+            return False, f"Failed to save file: {str(e)}", None, False
+        return True, f"Successfully processed {file_name}", output, True
 
     finally:
-        # Clean up
         if doc:
             try:
                 doc.close()
             except:
                 pass
-        if os.path.exists(temp_file):
+
+def process_pdf_sync(filepath: str, is_processing: bool, temp_file: Optional[str] = None,
+                     events=None, output_path: Optional[str] = "",
+                     profile: Optional[Dict] = None,
+                     white_threshold: float = WHITE_THRESHOLD,
+                     cache: Optional[Dict] = None) -> Tuple[bool, str, Dict]:
+    """Synchronous version of PDF processing.
+
+    The input is read once into memory and the result, if any, is written
+    back with one sequential write and an atomic rename. Returns success,
+    a message and I/O stats (bytes_read, bytes_written). temp_file lets the
+    caller choose (and journal) the temp path used for the write. events is
+    an optional queue that receives stage progress dicts and a final None.
+
+    output_path defaults to overwriting filepath. Any other path receives
+    every processed file, changed or not. With output_path=None nothing is
+    written and the result bytes are returned in stats['output'].
+
+    profile holds the FileProfiler options for capturing slow or sampled
+    files; None disables profiling. white_threshold is passed to
+    purge_pdf_bytes.
+
+    cache holds the ResultCache options ('dir', 'link'). The input is
+    looked up there first and a hit is written out without opening the
+    document (stats['cache_hit']); misses, and hits that cannot be read
+    back, are purged as usual and their result stored.
+
+    Storage errors are raised as OSError so the caller can retry them;
+    problems with the document itself are returned as a failed result.
+    """
+    file_name = os.path.basename(filepath)
+    if output_path == "":
+        output_path = filepath
+    temp_file = temp_file or (output_path or filepath) + str(uuid.uuid4()) + ".temp"
+    successful = False
+    stats = {'bytes_read': 0, 'bytes_written': 0}
+    profiler = FileProfiler(file_name, profile, events)
+
+    try:
+        logger.info(f"Starting processing of {file_name}")
+        
+        if not is_processing:
+            return False, "Processing stopped by user", stats
+        
+        with profiler:
+            data = read_file_bytes(filepath)
+            stats['bytes_read'] = len(data)
+            profiler.mark('read')
+
+            result_cache = ResultCache(cache['dir'], cache.get('link', False)) if cache else None
+            modified = None
+            if result_cache is not None:
+                key = result_cache.key(data, white_threshold)
+                try:
+                    cached = result_cache.lookup(key)
+                except OSError as e:
+                    logger.warning(f"Result cache unavailable for {file_name}: {e}")
+                    result_cache = cached = None
+                try:
+                    if cached is not None:
+                        modified = _deliver_cached(result_cache, filepath, output_path, temp_file, data,
+                                                   cached, stats)
+                except OSError as e:
+                    # E.g. the entry was pruned after the lookup; the cache never fails a file
+                    logger.warning(f"Could not use the cached result for {file_name}, purging it instead: {e}")
+                    stats.update(bytes_written=0)
+                    stats.pop('output', None)
+            if modified is not None:
+                successful = True
+                stats['cache_hit'] = True
+                message = (f"Successfully processed {file_name}" if modified else
+                           f"No modifications needed for {file_name}") + " (cached result)"
+                logger.info(message)
+                profiler.mark('written')
+            else:
+                # The profiler forwards stage events to the parent's queue
+                successful, message, output, modified = purge_pdf_bytes(data, file_name, is_processing, profiler,
+                                                                        white_threshold)
+                if not successful:
+                    return False, message, stats
+                del data  # Release the input before writing the result
+
+                _deliver(filepath, output_path, temp_file, output, modified, stats)
+                profiler.mark('written')
+                if result_cache is not None:
+                    try:
+                        result_cache.store(key, output if modified else None)
+                    except OSError as e:
+                        logger.warning(f"Could not store the result of {file_name} in the cache: {e}")
+        if modified:
+            logger.info(f"Successfully processed {file_name} "
+                        f"(read {stats['bytes_read']} bytes, wrote {stats['bytes_written']} bytes)")
+            _emit(events, 'saved', file_name, bytes_written=stats['bytes_written'])
+        return True, message, stats
+
+    except OSError as e:
+        logger.error(f"Storage error processing {file_name}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error processing {file_name}: {e}")
+        return False, f"Error processing {file_name}: {str(e)}", stats
+
+    finally:
+        logger.info(f"Finished processing {file_name}, successful: {successful}")
+        if events is not None:
             try:
-                os.remove(temp_file)
-            except:
+                events.put(None)  # End of this file's events
+            except Exception:
                 pass
-        logger.info(f"Finished processing {file_name}, successful: {successful}")
-
-    return successful, f"Successfully processed {file_name}" if successful else f"Failed to process {file_name}"
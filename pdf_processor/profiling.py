@@ -0,0 +1,102 @@
+import io
+import os
+import time
+import pstats
+import random
+import logging
+import cProfile
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("pdf_purger")
+
+# Most stage events kept per file; pages beyond this are not timed individually
+MAX_STAGES = 2000
+
+class FileProfiler:
+    """Optional cProfile and tracemalloc capture of one process_pdf_sync call.
+
+    options come from the caller: 'dir' for the dumps, 'threshold' in
+    seconds (files taking longer are dumped) and 'sample_rate' (fraction
+    of files dumped regardless). A threshold means every file has to be
+    profiled, since it is only known afterwards whether it was slow.
+    tracemalloc sees Python allocations only, not MuPDF's own memory.
+    Wraps the worker's event queue to time the processing stages.
+    """
+    def __init__(self, file_name: str, options: Optional[Dict] = None, events=None):
+        options = options or {}
+        self.file_name = file_name
+        self.dump_dir = options.get('dir') or ""
+        self.threshold = float(options.get('threshold') or 0)
+        self.sampled = random.random() < float(options.get('sample_rate') or 0)
+        self.enabled = bool(self.dump_dir) and (self.threshold > 0 or self.sampled)
+        self.events = events
+        self.stages: List[Tuple[str, float]] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+        self._start = 0.0
+
+    def mark(self, stage: str):
+        """Record the time a stage of the worker itself finished."""
+        if len(self.stages) < MAX_STAGES:
+            self.stages.append((stage, time.perf_counter() - self._start))
+
+    def put(self, event):
+        """Queue interface for _emit: record the stage time, then forward."""
+        if event is not None:
+            stage = event.get('stage', '?')
+            self.mark(f"page {event.get('page')}" if stage == 'page' else stage)
+        if self.events is not None:
+            self.events.put(event)
+
+    def __enter__(self) -> "FileProfiler":
+        self._start = time.perf_counter()
+        if self.enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        if not self.enabled:
+            return False
+        self._profile.disable()
+        try:
+            if self.sampled or elapsed >= self.threshold > 0:
+                self._dump(elapsed, "sampled" if self.sampled else "slow")
+        except Exception as e:
+            logger.warning(f"Could not write profile for {self.file_name}: {e}")
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        return False
+
+    def _dump(self, elapsed: float, reason: str):
+        os.makedirs(self.dump_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.dump_dir, f"{os.path.splitext(self.file_name)[0]}-{stamp}-{os.getpid()}")
+
+        self._profile.dump_stats(base + ".prof")
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+
+        report = io.StringIO()
+        report.write(f"File: {self.file_name}\nReason: {reason}\nElapsed: {elapsed:.3f} s\n")
+        report.write(f"Traced memory: {current / 1e6:.1f} MB current, {peak / 1e6:.1f} MB peak\n\n")
+        report.write("Stage timings (seconds since start):\n")
+        previous = 0.0
+        for stage, at in self.stages:
+            report.write(f"  {at:9.3f}  +{at - previous:8.3f}  {stage}\n")
+            previous = at
+        report.write("\nTop functions by cumulative time:\n")
+        pstats.Stats(self._profile, stream=report).sort_stats('cumulative').print_stats(30)
+        report.write("Top allocations by line:\n")
+        for stat in snapshot.statistics('lineno')[:25]:
+            report.write(f"  {stat}\n")
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+        logger.info(f"Wrote {reason} profile for {self.file_name} ({elapsed:.1f} s) to {base}.txt")
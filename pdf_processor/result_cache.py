@@ -0,0 +1,148 @@
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from typing import Optional, Tuple
+import fitz
+
+logger = logging.getLogger("pdf_purger")
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Linux ioctl that shares a file's extents copy-on-write (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Bump when a change to the purge code changes its output
+CACHE_VERSION = 1
+
+PURGED = "purged"
+UNCHANGED = "unchanged"
+_SUFFIXES = {PURGED: ".pdf", UNCHANGED: ".same"}
+
+class ResultCache:
+    """Purge results stored by the hash of their input, for documents seen before.
+
+    The key covers the input bytes, the purge settings, CACHE_VERSION and
+    the MuPDF version, so a hit stands for exactly the output the purge
+    would produce. Purged outputs are stored as files; inputs that needed
+    no changes get an empty marker. Entries are shared by all workers and
+    folders using the same directory, and the least recently used are
+    dropped by prune().
+
+    Hits are delivered as copies, reflinked where the filesystem can.
+    link=True hard-links them instead, which is only safe when nothing
+    ever edits the outputs in place: an incremental save by a PDF editor
+    would change the cache entry and every other copy along with it.
+    """
+    def __init__(self, directory: str, link: bool = False):
+        self.directory = directory
+        self.link = link
+
+    @staticmethod
+    def key(data: bytes, white_threshold: float) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{CACHE_VERSION}|{fitz.VersionBind}|{white_threshold!r}|".encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.directory, key[:2], key + _SUFFIXES[kind])
+
+    def lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """Kind and path of the entry for key, or None on a miss."""
+        for kind in (PURGED, UNCHANGED):
+            path = self._path(key, kind)
+            try:
+                # Mark it recently used for prune(); only the access time, since
+                # with link=True the entry may share its inode with a delivered file
+                os.utime(path, (time.time(), os.stat(path).st_mtime))
+                return kind, path
+            except FileNotFoundError:
+                continue
+        return None
+
+    def store(self, key: str, output: Optional[bytes]):
+        """Store a purged output, or with None, that the input needed no changes."""
+        path = self._path(key, UNCHANGED if output is None else PURGED)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}{uuid.uuid4()}.temp"
+        try:
+            with open(temp_path, 'wb') as f:
+                if output is not None:
+                    f.write(output)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _copy(entry_path: str, temp_file: str):
+        """Copy an entry, as a reflink when the filesystem supports one."""
+        if fcntl is not None:
+            with open(entry_path, 'rb') as src, open(temp_file, 'wb') as dst:
+                try:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    return
+                except OSError:
+                    pass  # Not supported here; copy the bytes
+        shutil.copyfile(entry_path, temp_file)
+
+    def deliver(self, entry_path: str, target_path: str, temp_file: str) -> int:
+        """Put a cached output at target_path through temp_file; returns its size."""
+        os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+        try:
+            if self.link:
+                try:
+                    os.link(entry_path, temp_file)
+                except OSError:
+                    if not os.path.exists(entry_path):
+                        raise
+                    self._copy(entry_path, temp_file)  # Another volume
+            else:
+                self._copy(entry_path, temp_file)
+            os.replace(temp_file, target_path)
+        except BaseException:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            raise
+        return os.path.getsize(target_path)
+
+    def prune(self, max_bytes: int) -> int:
+        """Drop the least recently used entries until the cache fits max_bytes; returns entries dropped."""
+        entries = []
+        total = 0
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.temp') and now - st.st_mtime < 3600:
+                    continue  # Possibly still being written
+                entries.append((st.st_atime, st.st_size, path, name.endswith('.temp')))
+                total += st.st_size
+        dropped = 0
+        for _, size, path, stale in sorted(entries, key=lambda e: (not e[3], e[0])):
+            if total <= max_bytes and not stale:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                dropped += 1
+            except OSError as e:
+                logger.debug(f"Could not drop cache entry {path}: {e}")
+        if dropped:
+            logger.info(f"Dropped {dropped} result cache entries from {self.directory}")
+        return dropped
@@ -0,0 +1,266 @@
+import os
+import io
+import glob
+import time
+import zlib
+import struct
+import tarfile
+import zipfile
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("pdf_purger")
+
+try:
+    import fcntl
+except ImportError:  # Windows, where an open file cannot be renamed instead
+    fcntl = None
+
+# Suffix of an archive still being written; renamed away by close()
+PARTIAL_SUFFIX = ".partial"
+
+# Zip local file header, and the zip64 extra field holding large sizes
+_ZIP_LOCAL = struct.Struct("<4s5H3L2H")
+_ZIP_LOCAL_MAGIC = b"PK\x03\x04"
+_ZIP64_EXTRA = 0x0001
+
+class OutputSink(ABC):
+    """Destination for purged documents.
+
+    Sinks with a target path are written by the purge worker itself; sinks
+    that receive data get the purged bytes back in the main process.
+    """
+    receives_data = False
+
+    def __init__(self, source_root: str):
+        self.source_root = source_root
+
+    def relative_path(self, source_path: str) -> str:
+        return os.path.relpath(source_path, self.source_root)
+
+    @abstractmethod
+    def target_path(self, source_path: str) -> Optional[str]:
+        """Path the worker writes the result to, None when the data comes back instead."""
+
+    def close(self):
+        pass
+
+class ReceivingSink(OutputSink):
+    """Sink that gets the purged bytes back and stores them itself."""
+    receives_data = True
+
+    def target_path(self, source_path: str) -> Optional[str]:
+        return None
+
+    @abstractmethod
+    def accept(self, source_path: str, data: bytes) -> int:
+        """Store returned data for source_path, returning the bytes written."""
+
+    @abstractmethod
+    def accept_file(self, source_path: str, file_path: str) -> int:
+        """Store a finished file for source_path, e.g. a rewritten archive, returning the bytes written."""
+
+class InPlaceSink(OutputSink):
+    """Overwrite each file in place (the default)."""
+    def target_path(self, source_path: str) -> Optional[str]:
+        return source_path
+
+class MirrorTreeSink(OutputSink):
+    """Write every processed file to the same relative path under another root."""
+    def __init__(self, source_root: str, output_root: str):
+        super().__init__(source_root)
+        self.output_root = output_root
+
+    def target_path(self, source_path: str) -> Optional[str]:
+        return os.path.join(self.output_root, self.relative_path(source_path))
+
+def _zip_members(f) -> Iterator[Tuple[str, bytes]]:
+    """Complete stored members of a zip that was never closed, read from the local headers.
+
+    An interrupted archive has no central directory, so zipfile cannot
+    open it; reading stops at the first member that is cut off or damaged.
+    """
+    while True:
+        header = f.read(_ZIP_LOCAL.size)
+        if len(header) < _ZIP_LOCAL.size:
+            return
+        magic, _, flags, method, _, _, crc, compressed, size, name_len, extra_len = _ZIP_LOCAL.unpack(header)
+        if magic != _ZIP_LOCAL_MAGIC or method != zipfile.ZIP_STORED or flags & 0x08:
+            return
+        name = f.read(name_len).decode('utf-8' if flags & 0x800 else 'cp437')
+        extra = f.read(extra_len)
+        if compressed == 0xFFFFFFFF:
+            # Sizes moved to the zip64 extra field: uncompressed, then compressed
+            pos = 0
+            while pos + 4 <= len(extra):
+                tag, length = struct.unpack_from("<2H", extra, pos)
+                if tag == _ZIP64_EXTRA and length >= 16:
+                    size, compressed = struct.unpack_from("<2Q", extra, pos + 4)
+                    break
+                pos += 4 + length
+            else:
+                return
+        data = f.read(compressed)
+        if len(data) < compressed or len(data) != size or zlib.crc32(data) != crc:
+            return
+        yield name, data
+
+def _tar_members(f) -> Iterator[Tuple[str, bytes]]:
+    """Complete members of a tar stream that was never closed."""
+    try:
+        with tarfile.open(fileobj=f, mode='r|') as tar:
+            for info in tar:
+                member = tar.extractfile(info)
+                if member is not None:
+                    yield info.name, member.read()
+    except (tarfile.TarError, EOFError, OSError):
+        return
+
+class ArchiveSink(ReceivingSink):
+    """Stream processed files into a zip or tar archive as they finish.
+
+    The archive is written under a .partial name and only renamed to
+    archive_path by close(), so a name without the suffix is always a
+    complete archive. Files taken from leftover partial archives, those
+    of runs that crashed before closing theirs, are carried over first;
+    their sources are already recorded as purged and are not purged again.
+    A partial archive is locked while its run writes it, so a run
+    starting alongside leaves it alone. accept() returns only once the
+    member is on disk, since its source is recorded as purged right after.
+    """
+    def __init__(self, source_root: str, archive_path: str, leftovers: Optional[List[str]] = None):
+        super().__init__(source_root)
+        self._lock = threading.Lock()
+        self._names = set()
+        os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+        self._file = self._create(archive_path)
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if archive_path.lower().endswith('.zip'):
+            # PDFs are already compressed, so store them as they are
+            self._zip = zipfile.ZipFile(self._file, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+            self._tar = None
+        else:
+            self._zip = None
+            # Not a 'w|' stream, which holds back up to a record of data in its own buffer
+            self._tar = tarfile.open(fileobj=self._file, mode='w')
+        for leftover in leftovers or []:
+            if leftover != self.partial_path:
+                self._carry_over(leftover)
+
+    def _create(self, archive_path: str):
+        """Create the partial archive, numbering the name if another run already took it."""
+        base, ext = os.path.splitext(archive_path)
+        number = 1
+        while True:
+            self.archive_path = archive_path
+            self.partial_path = archive_path + PARTIAL_SUFFIX
+            if not os.path.exists(archive_path):
+                try:
+                    return open(self.partial_path, 'xb')
+                except FileExistsError:
+                    pass
+            number += 1
+            archive_path = f"{base}-{number}{ext}"
+
+    @staticmethod
+    def _claim(leftover: str) -> Optional[str]:
+        """Take an interrupted archive for this run; None if its run is still writing it."""
+        try:
+            with open(leftover, 'rb') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                claimed = f"{leftover}.{os.getpid()}.claimed"
+                os.replace(leftover, claimed)  # Fails where the file is open, and for a second claimer
+            return claimed
+        except OSError:
+            return None
+
+    def _carry_over(self, leftover: str):
+        """Copy the complete members of an interrupted archive into this one, then remove it."""
+        claimed = self._claim(leftover)
+        if claimed is None:
+            return
+        members = _zip_members if self._zip is not None else _tar_members
+        count = 0
+        with open(claimed, 'rb') as f:
+            for name, data in members(f):
+                if self._write(name, data):
+                    count += 1
+        with self._lock:
+            self._sync()
+        os.remove(claimed)
+        logger.info(f"Carried {count} files over from interrupted archive {leftover}")
+
+    def _sync(self):
+        """Get everything written so far onto the disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write(self, name: str, data: bytes) -> bool:
+        with self._lock:
+            if name in self._names:
+                return False  # Already carried over from an interrupted archive
+            self._names.add(name)
+            if self._zip is not None:
+                self._zip.writestr(name, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                self._tar.addfile(info, io.BytesIO(data))
+        return True
+
+    def accept(self, source_path: str, data: bytes) -> int:
+        self._write(self.relative_path(source_path).replace(os.sep, '/'), data)
+        with self._lock:
+            self._sync()
+        return len(data)
+
+    def accept_file(self, source_path: str, file_path: str) -> int:
+        name = self.relative_path(source_path).replace(os.sep, '/')
+        with self._lock:
+            if name not in self._names:
+                self._names.add(name)
+                # Streamed from the file, which can be far larger than one document
+                if self._zip is not None:
+                    self._zip.write(file_path, name)
+                else:
+                    self._tar.add(file_path, name)
+            self._sync()
+        return os.path.getsize(file_path)
+
+    def close(self):
+        with self._lock:
+            if self._zip is None and self._tar is None:
+                return
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+            if self._tar is not None:
+                self._tar.close()
+                self._tar = None
+            if fcntl is None:
+                self._file.close()  # Windows cannot rename a file that is open
+            os.replace(self.partial_path, self.archive_path)
+            self._file.close()  # Keeps the lock until the archive has its final name
+        logger.info(f"Closed output archive {self.archive_path}")
+
+def create_sink(settings: Dict, folder_path: str) -> OutputSink:
+    """Build the output sink configured in settings for one folder run."""
+    mode = settings.get('output_mode', 'in_place')
+    output_root = settings.get('output_path') or ""
+    folder_name = os.path.basename(os.path.normpath(folder_path))
+
+    if mode == 'mirror' and output_root:
+        return MirrorTreeSink(folder_path, os.path.join(output_root, folder_name))
+    if mode in ('zip', 'tar') and output_root:
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        pattern = os.path.join(glob.escape(output_root), f"{glob.escape(folder_name)}-*.{mode}{PARTIAL_SUFFIX}")
+        return ArchiveSink(folder_path, os.path.join(output_root, f"{folder_name}-{stamp}.{mode}"),
+                           sorted(glob.glob(pattern)))
+    if mode != 'in_place':
+        logger.warning(f"Output mode {mode!r} needs an output_path; writing in place")
+    return InPlaceSink(folder_path)
@@ -1,9 +1,58 @@
 import fitz
 import logging
+from typing import Dict, List, Optional, Sequence, Tuple
 from nicegui import run
 
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, fall back to a per-span loop
+    np = None
+
 logger = logging.getLogger("pdf_purger")
 
+# Text and fills at or above this luminance (0-1) count as white
+WHITE_THRESHOLD = 0.95
+
+def _salvage_pdf_bytes(data: bytes) -> bytes:
+    """Trim junk before the PDF header and after the last EOF marker."""
+    start = data.find(b"%PDF-")
+    if start > 0:
+        data = data[start:]
+    end = data.rfind(b"%%EOF")
+    if end != -1:
+        data = data[:end + len(b"%%EOF")] + b"\n"
+    return data
+
+def open_document(filepath: str, data: Optional[bytes] = None) -> Tuple[fitz.Document, bool]:
+    """Open a PDF, repairing it in memory if a normal open fails.
+
+    When data is given the document is opened from those bytes instead of
+    the path. Returns the document and whether it had to be repaired.
+    Nothing is written to disk; a repaired document is saved with the
+    purge result.
+    """
+    try:
+        if data is None:
+            doc = fitz.open(filepath)
+        else:
+            doc = fitz.open(stream=data, filetype="pdf")
+        return doc, bool(getattr(doc, 'is_repaired', False))
+    except OSError:
+        raise
+    except Exception as e:
+        logger.warning(f"Error opening {filepath}: {e}, attempting in-memory repair")
+
+    if data is None:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    # MuPDF rebuilds a broken xref table when loading; trimming stray bytes
+    # lets it find the header and trailer of truncated or padded files.
+    doc = fitz.open(stream=_salvage_pdf_bytes(data), filetype="pdf")
+    if not doc.page_count:
+        doc.close()
+        raise ValueError("Repaired document has no pages")
+    return doc, True
+
 def repair_xrefs(doc: fitz.Document) -> bool:
     """Repair cross-references in PDF document."""
     try:
@@ -16,30 +65,57 @@ def repair_xrefs(doc: fitz.Document) -> bool:
         logger.warning(f"Warning during xref repair: {e}")
         return False
 
-def replace_white_with_black(page: fitz.Page):
-    """Replace white text with black text."""
+def span_luminance(colors: Sequence[int]):
+    """Luminance (0-1) of packed sRGB span colors, as an array when NumPy is available.
+
+    MuPDF reports every text color as sRGB, so gray and CMYK white arrive
+    here converted. Values above 24 bits carry a trailing alpha byte.
+    """
+    if np is not None:
+        packed = np.asarray(colors, dtype=np.int64)
+        rgb = np.where(packed > 0xFFFFFF, packed >> 8, packed)
+        return (0.2126 * ((rgb >> 16) & 0xFF) + 0.7152 * ((rgb >> 8) & 0xFF) + 0.0722 * (rgb & 0xFF)) / 255.0
+    luminance = []
+    for color in colors:
+        rgb = color >> 8 if color > 0xFFFFFF else color
+        luminance.append((0.2126 * ((rgb >> 16) & 0xFF) + 0.7152 * ((rgb >> 8) & 0xFF) + 0.0722 * (rgb & 0xFF)) / 255.0)
+    return luminance
+
+def find_white_spans(page: fitz.Page, threshold: float = WHITE_THRESHOLD) -> List[Dict]:
+    """Text spans on a page whose color is at or above the luminance threshold."""
+    spans = [span
+             for block in page.get_text("dict").get('blocks', []) if block.get("type", -1) == 0
+             for line in block.get("lines", [])
+             for span in line.get("spans", [])]
+    if not spans:
+        return []
+    luminance = span_luminance([span["color"] for span in spans])
+    if np is not None:
+        return [spans[i] for i in np.flatnonzero(luminance >= threshold)]
+    return [span for span, value in zip(spans, luminance) if value >= threshold]
+
+def replace_white_with_black(page: fitz.Page, threshold: float = WHITE_THRESHOLD) -> int:
+    """Overlay white and near-white text in black; returns the number of spans recolored."""
     try:
-        text_blocks = []
+        white_spans = find_white_spans(page, threshold)
+    except Exception as e:
+        logger.warning(f"Error getting text blocks on page {page.number + 1}: {e}")
+        return 0
+
+    recolored = 0
+    for span in white_spans:
+        if not span["text"].strip():
+            continue  # Nothing visible to recolor
         try:
-            text_dict = page.get_text("dict")
-            blocks = text_dict.get('blocks', [])
-            for block in blocks:
-                if block.get("type", -1) == 0:  # Text block
-                    text_blocks.append(block)
+            page.insert_text(
+                fitz.Rect(span["bbox"]).tl,
+                span["text"],
+                fontname=span["font"],
+                fontsize=span["size"],
+                color=0,  # black
+                overlay=True
+            )
+            recolored += 1
         except Exception as e:
-            logger.warning(f"Error getting text blocks on page {page.number + 1}: {e}")
-
-        for block in text_blocks:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    if span["color"] in (0xFFFFFF, 0xFFFFFF00):  # White text
-                        page.insert_text(
-                            fitz.Rect(span["bbox"]).tl,
-                            span["text"],
-                            fontname=span["font"],
-                            fontsize=span["size"],
-                            color=0,  # black
-                            overlay=True
-                        )
-    except Exception as e:
-        logger.warning(f"Error modifying text colors on page {page.number + 1}: {e}")
+            logger.warning(f"Error modifying text colors on page {page.number + 1}: {e}")
+    return recolored
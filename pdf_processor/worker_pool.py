@@ -0,0 +1,325 @@
+import os
+import sys
+import asyncio
+import logging
+import importlib
+import multiprocessing
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger("pdf_purger")
+
+try:
+    import psutil
+except ImportError:  # Optional dependency, fall back to the resource module
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Seconds a new worker gets to start and import the purge code
+WARM_UP_TIMEOUT = 120
+# Longest pause between attempts to start a worker that keeps failing
+MAX_SPAWN_DELAY = 30
+
+class FileTimeout(Exception):
+    """A file used up its time budget; the worker processing it was killed."""
+
+def _memory_used() -> int:
+    """This process's resident memory in bytes; its peak where only that is known, 0 if unknown."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return 0
+
+def _warm_up():
+    """Import the purge code, so a new worker's first file does not pay for it."""
+    importlib.import_module('pdf_processor.processor')
+
+def _worker_main(conn):
+    """Run tasks sent by the pool until told to stop or the pipe closes.
+
+    Every result goes back with the worker's memory use, for recycling.
+    """
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            result = (True, fn(*args))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result + (_memory_used(),))
+        except Exception as e:
+            conn.send((False, RuntimeError(f"Could not send result: {e}"), _memory_used()))
+
+class _Worker:
+    """One worker process and the pipe the pool talks to it through."""
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.files = 0
+        self.memory = 0
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(5)
+        finally:
+            self.conn.close()
+
+    def call(self, timeout: float, fn: Callable, *args) -> Any:
+        """Run a task synchronously, e.g. to warm a worker up before it joins the pool."""
+        try:
+            self.conn.send((fn, args))
+            if not self.conn.poll(timeout):
+                raise BrokenProcessPool(f"Worker {self.pid} did not answer within {timeout:.0f} s")
+            ok, value, self.memory = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise BrokenProcessPool(f"Worker {self.pid} died: {e}") from e
+        if not ok:
+            raise value
+        return value
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(5)
+        except (OSError, ValueError):
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+class WorkerPool:
+    """Process pool for purge work whose workers can be killed one at a time.
+
+    Unlike run.cpu_bound's executor, a task can be given a timeout: when
+    it runs out, the worker is killed, a fresh one takes its place and
+    FileTimeout is raised, so one document MuPDF loops on cannot hold a
+    slot for the rest of the run. A worker that dies on its own raises
+    BrokenProcessPool, which the retry policy treats as transient.
+
+    Workers are also recycled after max_files files, or once their memory
+    passes max_memory bytes, since MuPDF's store and fragmentation make
+    them grow over long runs. A warmed-up spare is kept ready whenever
+    recycling is on, so a retired worker is replaced without a pause.
+
+    Workers are started with spawn, never forked from this threaded
+    process, and the blocking pipe calls run on the pool's own threads so
+    files in flight do not tie up NiceGUI's shared io_bound threads. A
+    worker that cannot be started is retried in the background; while no
+    worker is alive at all, submit raises BrokenProcessPool.
+    """
+    def __init__(self, size: Optional[int] = None, max_files: int = 0, max_memory: int = 0):
+        self.size = max(1, int(size or os.cpu_count() or 1))
+        self.max_files = max(0, int(max_files))
+        self.max_memory = max(0, int(max_memory))
+        self._context = multiprocessing.get_context('spawn')
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._spares: List[_Worker] = []
+        self._spawning = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._broken = False
+        self.timeouts = 0
+        self.replaced = 0
+        self.recycled_files = 0
+        self.recycled_memory = 0
+
+    def configure(self, max_files: int = 0, max_memory: int = 0):
+        """Change the recycling limits; workers past the new limits retire after their next file."""
+        self.max_files = max(0, int(max_files))
+        self.max_memory = max(0, int(max_memory))
+
+    @property
+    def recycling(self) -> bool:
+        return bool(self.max_files or self.max_memory)
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of worker replacements since the pool started, for run metrics."""
+        return {
+            'workers': len(self._workers) - len(self._spares),
+            'spares': len(self._spares),
+            'timeouts': self.timeouts,
+            'replaced': self.replaced,
+            'recycled_files': self.recycled_files,
+            'recycled_memory': self.recycled_memory,
+            'max_worker_memory': max((worker.memory for worker in self._workers), default=0),
+        }
+
+    async def _io(self, fn: Callable, *args) -> Any:
+        """Run a blocking pipe or process call on the pool's own threads."""
+        if self._executor is None:
+            # Per worker in flight one thread for its pipe and one for its events, plus room for upkeep
+            self._executor = ThreadPoolExecutor(max_workers=3 * self.size + 2, thread_name_prefix='purge-pool')
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args))
+
+    async def wait(self, fn: Callable, *args) -> Any:
+        """Run a blocking call that waits on the workers, e.g. for their progress events."""
+        return await self._io(fn, *args)
+
+    def _background(self, coro, action: str):
+        """Run pool upkeep as a task that is kept referenced and whose failure is logged."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+
+        def done(task: asyncio.Task):
+            self._tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Worker pool could not {action}: {task.exception()}")
+
+        task.add_done_callback(done)
+
+    async def _ensure_started(self):
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._background(self._fill_slot(), "start a worker")
+        self._fill_spares()
+
+    async def _spawn(self) -> _Worker:
+        worker = await self._io(_Worker, self._context)
+        try:
+            await self._io(worker.call, WARM_UP_TIMEOUT, _warm_up)
+        except BaseException:
+            await self._io(worker.kill)
+            raise
+        self._workers.append(worker)
+        return worker
+
+    async def _fill_slot(self):
+        """Start a worker for the idle queue, retrying until one starts or the pool shuts down."""
+        attempt = 0
+        while self._idle is not None:
+            try:
+                worker = await self._spawn()
+            except Exception as e:
+                attempt += 1
+                delay = min(MAX_SPAWN_DELAY, 2 ** attempt)
+                logger.error(f"Could not start a purge worker (attempt {attempt}), retrying in {delay} s: {e}")
+                if not self._workers and not self._broken and self._idle is not None:
+                    self._broken = True
+                    self._idle.put_nowait(None)  # Wake the callers waiting for a worker
+                await asyncio.sleep(delay)
+                continue
+            self._broken = False
+            if self._idle is None:
+                await self._io(worker.stop)  # Shut down meanwhile
+            else:
+                self._idle.put_nowait(worker)
+            return
+
+    async def _next_worker(self) -> _Worker:
+        while True:
+            worker = await self._idle.get()
+            if worker is not None:
+                return worker
+            if self._broken:
+                self._idle.put_nowait(None)  # Leave the wake-up for the other callers
+                raise BrokenProcessPool("No purge worker could be started")
+            # Left over from an outage that is over
+
+    def _fill_spares(self):
+        """Start warming a spare in the background if recycling wants one."""
+        if self.recycling and self._idle is not None and len(self._spares) + self._spawning < 1:
+            self._spawning += 1
+            self._background(self._add_spare(), "start a spare worker")
+
+    async def _add_spare(self):
+        try:
+            spare = await self._spawn()
+        finally:
+            self._spawning -= 1
+        if self._idle is None:
+            await self._io(spare.stop)  # Shut down meanwhile
+        else:
+            self._spares.append(spare)
+
+    async def _retire(self, worker: _Worker, kill: bool):
+        """Take a worker out of the pool and put a spare, or a new worker, in its place."""
+        self._workers.remove(worker)
+        from_spare = bool(self._spares)
+        if from_spare:
+            self._idle.put_nowait(self._spares.pop())
+            self._fill_spares()
+        try:
+            await self._io(worker.kill if kill else worker.stop)
+        except Exception as e:
+            logger.warning(f"Could not stop worker {worker.pid}: {e}")
+        if not from_spare:
+            await self._fill_slot()
+
+    def _recycle_reason(self, worker: _Worker) -> Optional[str]:
+        """Which limit, if any, a worker has reached: 'files' or 'memory'."""
+        if self.max_files and worker.files >= self.max_files:
+            return 'files'
+        if self.max_memory and worker.memory >= self.max_memory:
+            return 'memory'
+        return None
+
+    async def submit(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Run fn(*args) in a worker, killing the worker after timeout seconds."""
+        await self._ensure_started()
+        worker = await self._next_worker()
+        healthy = False
+        try:
+            await self._io(worker.conn.send, (fn, args))
+            if not await self._io(worker.conn.poll, timeout):
+                self.timeouts += 1
+                raise FileTimeout(f"no result within {timeout:.1f} s, worker {worker.pid} killed")
+            ok, value, worker.memory = await self._io(worker.conn.recv)
+            worker.files += 1
+            healthy = True
+        except (EOFError, OSError) as e:
+            raise BrokenProcessPool(f"Worker {worker.pid} died: {e}") from e
+        finally:
+            reason = self._recycle_reason(worker) if healthy else None
+            if reason == 'files':
+                self.recycled_files += 1
+                logger.info(f"Recycling worker {worker.pid} after {worker.files} files")
+            elif reason == 'memory':
+                self.recycled_memory += 1
+                logger.info(f"Recycling worker {worker.pid} at {worker.memory / 1e6:.0f} MB")
+            if reason:
+                self._background(self._retire(worker, kill=False), "recycle a worker")
+            elif healthy:
+                self._idle.put_nowait(worker)
+            else:
+                # Timed out, died or abandoned by a cancelled caller
+                self.replaced += 1
+                self._background(self._retire(worker, kill=True), "replace a worker")
+        if not ok:
+            raise value
+        return value
+
+    def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        for worker in self._workers:
+            worker.stop()
+        self._workers.clear()
+        self._spares.clear()
+        self._idle = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
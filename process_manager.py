@@ -1,81 +1,63 @@
-from typing import Set
-from nicegui import app, ui
+import os
+from typing import Any, Dict, List, Optional
+from core.jobs import Job
 
 class ProcessManager:
-    """Handle process state management and concurrency control."""
-    def __init__(self):
-        self._processing = False
-        self._stop_requested = False
-        self._active_folders = set()
-        
-    def start_processing(self, folder_path: str = None) -> bool:
-        """Start processing with optional folder tracking."""
-        if self.is_processing():
-            return False
-            
-        self._processing = True
-        self._stop_requested = False
-        
-        if folder_path:
-            self._active_folders.add(folder_path)
+    """Server-side registry of processing jobs.
 
-        # Update storage if in page context
-        try:
-            app.storage.user['processing'] = True
-            app.storage.user['stop_requested'] = False
-            app.storage.user['active_folders'] = list(self._active_folders)
-        except RuntimeError:
-            pass
-            
-        return True
-        
-    def stop_processing(self) -> bool:
-        """Request processing stop with notification."""
-        if not self.is_processing():
-            return False
-            
-        self._processing = False  # Changed this to immediately stop processing
-        self._stop_requested = True
-        
-        # Update storage if in page context
-        try:
-            app.storage.user['processing'] = False
-            app.storage.user['stop_requested'] = True
-        except RuntimeError:
-            pass
-            
-        ui.notify("Processing will stop", 
-                 color="warning", 
-                 position="top")
-        return True
-        
-    def reset(self):
-        """Reset all process state."""
-        self._processing = False
-        self._stop_requested = False
-        self._active_folders = set()
-        
-        # Update storage if in page context
-        try:
-            app.storage.user['processing'] = False
-            app.storage.user['stop_requested'] = False
-            app.storage.user['active_folders'] = []
-        except RuntimeError:
-            pass
-            
-    def is_processing(self) -> bool:
-        """Check if processing is currently active."""
-        return self._processing
-        
-    def is_stop_requested(self) -> bool:
-        """Check if processing stop has been requested."""
-        return self._stop_requested
-        
-    def sync_with_storage(self):
-        """Sync process state with storage on reconnection."""
-        try:
-            self._processing = app.storage.user.get('processing', False)
-            self._stop_requested = app.storage.user.get('stop_requested', False)
-            self._active_folders = set(app.storage.user.get('active_folders', []))
-        except RuntimeError:
-            pass  # Not in page context
+    Each run is a Job with its own ID, state, counters and cancellation
+    token, so jobs run side by side and every browser session sees the
+    same jobs. Finished jobs are kept, up to max_finished, for status queries.
+    """
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Job] = {}
+
+    def create_job(self, folders: List[str], options: Optional[Dict[str, Any]] = None) -> Job:
+        """Register a new job for the given folders."""
+        self._prune_finished()
+        job = Job([os.path.abspath(folder) for folder in folders], options)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def active_jobs(self) -> List[Job]:
+        return [job for job in self._jobs.values() if not job.is_finished]
+
+    def job_for_folder(self, folder_path: str) -> Optional[Job]:
+        """The active job processing folder_path, if any."""
+        folder_path = os.path.abspath(folder_path)
+        for job in self.active_jobs():
+            if folder_path in job.folders:
+                return job
+        return None
+
+    def stop_job(self, job_id: str) -> bool:
+        """Request a stop of one job."""
+        job = self._jobs.get(job_id)
+        return job.cancel() if job else False
+
+    def stop_folder(self, folder_path: str) -> bool:
+        """Request a stop of the job processing folder_path."""
+        job = self.job_for_folder(folder_path)
+        return job.cancel() if job else False
+
+    def stop_all(self) -> int:
+        """Request a stop of every active job; returns how many were stopped."""
+        return sum(job.cancel() for job in self.active_jobs())
+
+    def is_processing(self, folder_path: Optional[str] = None) -> bool:
+        """Check if any job (or the job for folder_path) is running."""
+        if folder_path is not None:
+            return self.job_for_folder(folder_path) is not None
+        return bool(self.active_jobs())
+
+    def _prune_finished(self):
+        finished = [job for job in self._jobs.values() if job.is_finished]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]